@@ -1,37 +1,58 @@
-from http.server import BaseHTTPRequestHandler
-import json
+from collections import deque
+import gzip
 import time
 import sys
 import os
+from urllib.parse import urlsplit
+
+# Shared response helpers (api/_http.py)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _http import RawResponseHandler, header_block, json_dumps, json_loads, GET_HEADERS, POST_HEADERS, ERROR_HEADERS
+
+GZIP_GET_HEADERS = GET_HEADERS + b"Content-Encoding: gzip\r\nVary: Accept-Encoding\r\n"
+# This endpoint takes both GET and POST
+OPTIONS_HEADERS = header_block('GET, POST, OPTIONS', content_type=False)
+
+# Smaller bodies aren't worth compressing
+GZIP_MIN_SIZE = 1024
+
+def accepts_gzip(accept_encoding):
+    """Whether an Accept-Encoding value allows gzip; a coding listed with q=0 is refused"""
+    wildcard = False
+    for coding in accept_encoding.split(','):
+        name, _, params = coding.partition(';')
+        name = name.strip().lower()
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name in ('gzip', 'x-gzip'):
+            # An explicit entry for gzip overrides any wildcard
+            return quality > 0
+        if name == '*':
+            wildcard = quality > 0
+    return wildcard
 
 # Global log storage for debugging (in-memory for serverless)
-debug_logs = []
+# Bounded ring buffer: keeps only the last 50 entries to prevent memory bloat
+debug_logs = deque(maxlen=50)
 
 def add_debug_log(log_entry):
     """Add a debug log entry"""
-    global debug_logs
     log_entry['timestamp'] = time.time()
     log_entry['iso_timestamp'] = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime())
     debug_logs.append(log_entry)
-    
-    # Keep only last 50 entries to prevent memory bloat
-    if len(debug_logs) > 50:
-        debug_logs = debug_logs[-50:]
 
-class handler(BaseHTTPRequestHandler):
+class handler(RawResponseHandler):
     def do_GET(self):
         try:
-            # Set CORS headers
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.send_header('Access-Control-Allow-Methods', 'GET, OPTIONS')
-            self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-            self.end_headers()
-            
             # Return current debug logs
             response = {
-                "logs": debug_logs,
+                "logs": list(debug_logs),
                 "total_logs": len(debug_logs),
                 "server_time": time.time(),
                 "server_info": {
@@ -41,70 +62,52 @@ class handler(BaseHTTPRequestHandler):
                     "note": "Logs are cleared on serverless function restart"
                 }
             }
+            # Compact by default; ?pretty=1 indents for humans reading it in a browser
+            pretty = 'pretty=1' in urlsplit(self.path).query.split('&')
+            body = json_dumps(response, pretty=pretty)
             
-            self.wfile.write(json.dumps(response, indent=2).encode())
+            # Level 1 is the fastest setting and still shrinks repetitive log JSON several-fold
+            if len(body) > GZIP_MIN_SIZE and accepts_gzip(self.headers.get('Accept-Encoding', '')):
+                self.send_raw_response(200, GZIP_GET_HEADERS, gzip.compress(body, compresslevel=1))
+            else:
+                self.send_raw_response(200, GET_HEADERS, body)
             
         except Exception as e:
-            self.send_response(500)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            
             error_response = {
                 "error": f"Error fetching debug logs: {str(e)}",
                 "type": type(e).__name__
             }
-            self.wfile.write(json.dumps(error_response).encode())
+            self.send_raw_response(500, ERROR_HEADERS, json_dumps(error_response))
     
     def do_POST(self):
         try:
-            # Set CORS headers
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
-            self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-            self.end_headers()
-            
             # Read and parse request for adding custom log entry
             content_length = int(self.headers['Content-Length'])
             post_data = self.rfile.read(content_length)
-            request_data = json.loads(post_data.decode('utf-8'))
+            request_data = json_loads(post_data)
             
             log_entry = request_data.get('log_entry', {})
             log_type = request_data.get('type', 'custom')
             
-            # Add the log entry
-            add_debug_log({
-                'type': log_type,
-                'source': 'api_client',
-                **log_entry
-            })
+            # Add the log entry; it was freshly decoded, so fill in defaults in place
+            # (client-supplied 'type'/'source' still take precedence)
+            log_entry.setdefault('type', log_type)
+            log_entry.setdefault('source', 'api_client')
+            add_debug_log(log_entry)
             
             response = {
                 "success": True,
                 "message": "Log entry added",
                 "total_logs": len(debug_logs)
             }
-            
-            self.wfile.write(json.dumps(response).encode())
+            self.send_raw_response(200, POST_HEADERS, json_dumps(response))
             
         except Exception as e:
-            self.send_response(500)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            
             error_response = {
                 "error": f"Error adding debug log: {str(e)}",
                 "type": type(e).__name__
             }
-            self.wfile.write(json.dumps(error_response).encode())
+            self.send_raw_response(500, ERROR_HEADERS, json_dumps(error_response))
     
     def do_OPTIONS(self):
-        self.send_response(200)
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.end_headers()
-        self.wfile.write(b'')
\ No newline at end of file
+        self.send_raw_response(200, OPTIONS_HEADERS)
\ No newline at end of file
@@ -1,28 +1,21 @@
-from http.server import BaseHTTPRequestHandler
-import json
+import sys
+import os
 
-class handler(BaseHTTPRequestHandler):
+# Shared response helpers (api/_http.py)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _http import RawResponseHandler, json_dumps, GET_HEADERS, GET_OPTIONS_HEADERS
+
+# The health payload never changes, so it is serialized once per cold start
+HEALTHY_BODY = json_dumps({
+    "status": "healthy",
+    "nlp_ready": True,
+    "parser_ready": True,
+    "version": "1.0.0"
+})
+
+class handler(RawResponseHandler):
     def do_GET(self):
-        self.send_response(200)
-        self.send_header('Content-Type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.end_headers()
-        
-        response = {
-            "status": "healthy",
-            "nlp_ready": True,
-            "parser_ready": True,
-            "version": "1.0.0"
-        }
-        
-        self.wfile.write(json.dumps(response).encode())
+        self.send_raw_response(200, GET_HEADERS, HEALTHY_BODY)
     
     def do_OPTIONS(self):
-        self.send_response(200)
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.end_headers()
-        self.wfile.write(b'')
\ No newline at end of file
+        self.send_raw_response(200, GET_OPTIONS_HEADERS)
\ No newline at end of file
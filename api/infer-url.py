@@ -1,59 +1,64 @@
 """
 Vercel serverless function for URL inference
 """
-from http.server import BaseHTTPRequestHandler
-import json
+import asyncio
 import sys
 import os
 
+# Shared response helpers (api/_http.py)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _http import RawResponseHandler, json_dumps, json_loads, POST_HEADERS, ERROR_HEADERS, POST_OPTIONS_HEADERS
+
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
 
-class handler(BaseHTTPRequestHandler):
+# Build the engine and event loop once per container so warm invocations reuse them.
+# A failed engine init is re-raised inside do_POST to keep the existing 500 path.
+_ENGINE = None
+_ENGINE_ERROR = None
+try:
+    from triage import URLInferenceEngine
+    _ENGINE = URLInferenceEngine()
+except Exception as e:
+    _ENGINE_ERROR = e
+
+# One event loop lives for the whole container; use uvloop's faster loop when installed
+try:
+    import uvloop
+    _LOOP = uvloop.new_event_loop()
+except ImportError:
+    _LOOP = asyncio.new_event_loop()
+asyncio.set_event_loop(_LOOP)
+
+# Fixed reply for descriptions that don't look like a website, serialized once
+NO_URL_BODY = json_dumps({
+    "url": "",
+    "confidence": "none",
+    "explanation": "Does not appear to be describing a website"
+})
+
+class handler(RawResponseHandler):
     def do_POST(self):
         try:
-            from triage import URLInferenceEngine
-            import asyncio
-            
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
-            self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-            self.end_headers()
+            if _ENGINE is None:
+                raise _ENGINE_ERROR
             
             content_length = int(self.headers['Content-Length'])
             post_data = self.rfile.read(content_length)
-            request_data = json.loads(post_data.decode('utf-8'))
+            request_data = json_loads(post_data)
             
             description = request_data.get('description', '')
             
-            engine = URLInferenceEngine()
-            
-            if not engine.might_be_url_description(description):
-                result = {
-                    "url": "",
-                    "confidence": "none",
-                    "explanation": "Does not appear to be describing a website"
-                }
-            else:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                result = loop.run_until_complete(engine.infer_url(description))
+            # Cheap, side-effect-free substring check; most requests stop here without touching the loop
+            if not _ENGINE.might_be_url_description(description):
+                self.send_raw_response(200, POST_HEADERS, NO_URL_BODY)
+                return
             
-            self.wfile.write(json.dumps(result).encode())
+            result = _LOOP.run_until_complete(_ENGINE.infer_url(description))
+            self.send_raw_response(200, POST_HEADERS, json_dumps(result))
             
         except Exception as e:
-            self.send_response(500)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            
             error_response = {"error": f"Error inferring URL: {str(e)}"}
-            self.wfile.write(json.dumps(error_response).encode())
+            self.send_raw_response(500, ERROR_HEADERS, json_dumps(error_response))
     
     def do_OPTIONS(self):
-        self.send_response(200)
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.end_headers()
+        self.send_raw_response(200, POST_OPTIONS_HEADERS)
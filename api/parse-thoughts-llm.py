@@ -1,36 +1,181 @@
-from http.server import BaseHTTPRequestHandler
-import json
 import re
 import time
 import sys
 import os
+import io
+import logging
+import hashlib
+import socket
+import threading
+import traceback
+from collections import Counter, OrderedDict
+from itertools import islice
+import http.client
+import urllib.error
+
+# Shared response helpers (api/_http.py)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _http import RawResponseHandler, RawJSON, json_dumps, json_loads, POST_HEADERS, ERROR_HEADERS, POST_OPTIONS_HEADERS
+
+# Patterns used by the rule-based parser, compiled once per container
+_WS_RE = re.compile(r'\s+')
+# A filler word plus the space before it when a space follows, so no double space is left behind
+_DISFLUENCY_RE = re.compile(r' (?:um|uh|er|ah)\b(?= )|\b(?:um|uh|er|ah)\b', re.IGNORECASE)
+_SENT_RE = re.compile(r'[.!?]+')
+_CONJ_RE = re.compile(r'\b(and|but|so|then)\b')
+_WORD_RE = re.compile(r'\b[a-zA-Z]{3,}\b')
+_CAP_RE = re.compile(r'\b[A-Z][a-z]+\b')
+
+# Word lists as frozensets for O(1) membership checks
+_CONJUNCTIONS = frozenset({'and', 'but', 'so', 'then'})
+_STOP_WORDS = frozenset({'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'from', 'about', 'i', 'me', 'my', 'we', 'you', 'they', 'it', 'is', 'are', 'was', 'were', 'be', 'been', 'have', 'has', 'had', 'do', 'did', 'will', 'would', 'could', 'should', 'can', 'this', 'that', 'these', 'those'})
+_POS_WORDS = frozenset({'good', 'great', 'excellent', 'amazing', 'wonderful', 'happy', 'excited'})
+_NEG_WORDS = frozenset({'bad', 'terrible', 'awful', 'horrible', 'sad', 'angry', 'frustrated'})
+
+_TRANSITION_MARKERS = {
+    'temporal': ['then', 'next', 'after', 'before', 'meanwhile', 'now', 'later'],
+    'logical': ['but', 'however', 'although', 'though', 'nevertheless', 'anyway'],
+    'additive': ['also', 'additionally', 'furthermore', 'moreover'],
+    'topic_shift': ['speaking of', 'by the way', 'oh', 'wait', 'actually', 'I mean'],
+    'decision': ['I should', 'I need to', 'I have to', 'let me'],
+    'memory': ['I remember', 'I forgot', 'I was thinking', 'I realized']
+}
+# One scan per sentence: a marker at the start of the sentence, or as a space-delimited phrase inside it
+_MARKER_ALT = '|'.join(re.escape(marker) for markers in _TRANSITION_MARKERS.values() for marker in markers)
+_TRANSITION_RE = re.compile(rf'^(?:{_MARKER_ALT})| (?:{_MARKER_ALT}) ')
+
+# Cloudflare Workers endpoint; the HTTPS connection is kept alive per thread so warm
+# invocations skip the TCP+TLS handshake
+CLOUDFLARE_HOST = "huihui-cognee-processor.scott-c93.workers.dev"
+CLOUDFLARE_PATH = "/api/ramble-thoughts"
+CLOUDFLARE_HEADERS = {
+    'Content-Type': 'application/json',
+    'User-Agent': 'ThoughtRambler/1.0',
+    'Accept': 'application/json'
+}
+_cloudflare = threading.local()
+
+def _env_timeout(name, default):
+    """Read a positive timeout in seconds from the environment, falling back to the default"""
+    raw = os.environ.get(name, '').strip()
+    if not raw:
+        return default
+    try:
+        value = float(raw)
+    except ValueError:
+        value = None
+    # A zero timeout would make the socket non-blocking, and nan/inf never fire
+    if value is None or not 0 < value < float('inf'):
+        logging.getLogger(__name__).warning(f"Ignoring invalid {name}={raw!r}, using {default}s")
+        return default
+    return value
+
+# Seconds to wait on the worker; override with CF_TIMEOUT to tighten tail latency
+CLOUDFLARE_TIMEOUT = _env_timeout('CF_TIMEOUT', 15.0)
+# Inputs shorter than this are parsed rule-based; the LLM adds nothing for a sentence or two
+LLM_MIN_TEXT_LENGTH = 120
+
+def cloudflare_post(body, headers, timeout=CLOUDFLARE_TIMEOUT):
+    """POST to Cloudflare over a reused connection, raising HTTPError/URLError like urlopen"""
+    for attempt in range(2):
+        conn = getattr(_cloudflare, 'conn', None)
+        reused = conn is not None
+        if not reused:
+            conn = _cloudflare.conn = http.client.HTTPSConnection(CLOUDFLARE_HOST, timeout=timeout)
+        try:
+            conn.request('POST', CLOUDFLARE_PATH, body=body, headers=headers)
+            response = conn.getresponse()
+        except (http.client.HTTPException, OSError) as e:
+            conn.close()
+            _cloudflare.conn = None
+            # The server may have dropped an idle kept-alive socket; retry once on a fresh one
+            # (but never after a timeout, which would double the work upstream)
+            if reused and not isinstance(e, TimeoutError):
+                continue
+            raise urllib.error.URLError(e)
+        if response.status >= 400:
+            # Drain the body so the connection stays usable, then surface it like urlopen would
+            error_body = io.BytesIO(response.read())
+            raise urllib.error.HTTPError(
+                f"https://{CLOUDFLARE_HOST}{CLOUDFLARE_PATH}", response.status, response.reason, response.headers, error_body
+            )
+        return response
+
+logger = logging.getLogger(__name__)
+
+# Per-group detail in verbose_log and 500 tracebacks are only produced when DEBUG is set in the environment
+DEBUG = os.environ.get('DEBUG', '').lower() in ('1', 'true', 'yes')
+
+def preview(data, limit):
+    """Leading slice of a str or bytes for logs, with '...' appended when truncated"""
+    head = data[:limit]
+    if isinstance(head, bytes):
+        # Only the slice is decoded; the parser works on the raw bytes
+        head = head.decode('utf-8', 'replace')
+    return head + "..." if len(data) > limit else head
+
+# Request bodies are read into a per-thread buffer that is reused across requests;
+# unusually large bodies get a one-off allocation so the buffer stays small
+BODY_BUFFER_MAX = 1 << 20
+# Requests above this are refused with 413 before any of the body is read
+MAX_BODY_SIZE = 2_000_000
+_body_buffer = threading.local()
+
+def read_body(rfile, length):
+    """Read exactly length bytes from rfile, returning a view into the reusable buffer"""
+    if length > BODY_BUFFER_MAX:
+        return rfile.read(length)
+    buf = getattr(_body_buffer, 'buf', None)
+    if buf is None or len(buf) < length:
+        buf = _body_buffer.buf = bytearray(max(length, 65536))
+    view = memoryview(buf)[:length]
+    filled = 0
+    while filled < length:
+        n = rfile.readinto(view[filled:])
+        if not n:
+            break
+        filled += n
+    return view[:filled]
+
+# Successful Cloudflare results keyed by a hash of the request; least recently used evicted first
+LLM_CACHE_SIZE = 256
+LLM_CACHE_TTL = 600  # Seconds before a cached result is refetched
+_llm_cache = OrderedDict()
+_llm_cache_lock = threading.Lock()
 
 # Ensure we don't import the main app by accident
 sys.path = [path for path in sys.path if 'backend' not in path or 'api' in path]
 
-class handler(BaseHTTPRequestHandler):
+class handler(RawResponseHandler):
+    rbufsize = 65536  # Buffer large enough that a typical ramble body arrives in one read
+    
+    def setup(self):
+        super().setup()
+        try:
+            # Larger kernel receive buffer so big POST bodies don't trickle in
+            self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 262144)
+        except (AttributeError, OSError):
+            pass
+    
     def do_POST(self):
         try:
-            # Set CORS headers
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
-            self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-            self.end_headers()
-            
             # Read and parse request
-            content_length = int(self.headers['Content-Length'])
-            post_data = self.rfile.read(content_length)
-            request_data = json.loads(post_data.decode('utf-8'))
+            content_length = int(self.headers.get('Content-Length') or 0)
+            if content_length > MAX_BODY_SIZE:
+                self.send_raw_response(413, ERROR_HEADERS, json_dumps({"error": "Request body too large"}))
+                return
+            # The view is only valid until the next request, so it is parsed straight away
+            request_data = json_loads(read_body(self.rfile, content_length))
             
             text = request_data.get('text', '').strip()
             provider = request_data.get('provider', 'openai')
             model = request_data.get('model', 'gpt-3.5-turbo')
             enable_llm = request_data.get('enable_llm', False)
+            # Raw upstream payloads are only included when asked for
+            verbose = request_data.get('verbose', False)
             
             if not text:
-                self.send_error(400, "Text input cannot be empty")
+                self.send_raw_response(400, ERROR_HEADERS, json_dumps({"error": "Text input cannot be empty"}))
                 return
             
             # Parse thoughts - try LLM enhancement if enabled, fallback to basic
@@ -39,10 +184,11 @@ class handler(BaseHTTPRequestHandler):
             # Initialize verbose log for UI display
             verbose_log = None
             llm_response_data = None
+            text_too_short = enable_llm and len(text) < LLM_MIN_TEXT_LENGTH
             
-            if enable_llm:
+            if enable_llm and not text_too_short:
                 # Try to use Cloudflare Workers LLM enhancement
-                llm_response = self.parse_thoughts_llm_enhanced(text, provider, model)
+                llm_response = self.parse_thoughts_llm_enhanced(text, provider, model, verbose)
                 
                 # Extract verbose log for UI display
                 if llm_response and 'verbose_log' in llm_response:
@@ -84,15 +230,21 @@ class handler(BaseHTTPRequestHandler):
                     "llm_requested": enable_llm,
                     "endpoint": "parse-thoughts-llm",
                     "llm_provider": "cloudflare-workers" if llm_enhanced else "rule-based",
-                    "note": "Cloudflare Workers LLM active" if llm_enhanced else "Cloudflare LLM unavailable - using rule-based fallback" if enable_llm else "Basic parsing via LLM endpoint",
+                    "note": "Cloudflare Workers LLM active" if llm_enhanced else "Input too short for LLM - using rule-based parsing" if text_too_short else "Cloudflare LLM unavailable - using rule-based fallback" if enable_llm else "Basic parsing via LLM endpoint",
                     "average_chunk_length": sum(len(chunk['text']) for chunk in chunks) / len(chunks) if chunks else 0,
                     "debug_chunks_count": len(chunks),
                     "debug_chunks_type": type(chunks).__name__
-                },
+                }
+            }
+            
+            # Logging sections are only sent when they carry data or the client asked for them
+            if verbose_log is not None:
+                response["verbose_log"] = verbose_log
+            if llm_response_data is not None:
+                response["llm_details"] = llm_response_data
+            if verbose:
                 # Add verbose logging data for UI display
-                "verbose_log": verbose_log,
-                "llm_details": llm_response_data,
-                "request_info": {
+                response["request_info"] = {
                     "endpoint_used": "/api/parse-thoughts-llm",
                     "fallback_occurred": enable_llm and not llm_enhanced,
                     "request_timestamp": start_time,
@@ -104,42 +256,49 @@ class handler(BaseHTTPRequestHandler):
                         "Metadata generation"
                     ]
                 }
-            }
             
-            self.wfile.write(json.dumps(response).encode())
+            self.send_raw_response(200, POST_HEADERS, json_dumps(response))
             
         except Exception as e:
-            self.send_response(500)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            
-            # Provide detailed error information for debugging
-            import traceback
+            # The traceback goes to the function logs; the client gets the short form
+            logger.exception("parse-thoughts-llm request failed")
             error_response = {
                 "error": f"Error processing text: {str(e)}", 
-                "type": type(e).__name__,
-                "traceback": traceback.format_exc()
+                "type": type(e).__name__
             }
-            self.wfile.write(json.dumps(error_response).encode())
+            if DEBUG:
+                error_response["traceback"] = traceback.format_exc()
+            self.send_raw_response(500, ERROR_HEADERS, json_dumps(error_response))
     
     def do_OPTIONS(self):
-        self.send_response(200)
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.end_headers()
-        self.wfile.write(b'')
+        self.send_raw_response(200, POST_OPTIONS_HEADERS)
     
-    def parse_thoughts_llm_enhanced(self, text, provider="cloudflare", model="llama-3.1-8b-instruct-fast"):
+    def parse_thoughts_llm_enhanced(self, text, provider="cloudflare", model="llama-3.1-8b-instruct-fast", verbose=False):
         """Use Cloudflare Workers LLM for enhanced thought parsing with verbose logging"""
+        # Repeated inputs are served from the cache without another round-trip
+        cache_key = hashlib.blake2b(f"{provider}|{model}|{verbose}|{text}".encode(), digest_size=16).digest()
+        now = time.monotonic()
+        cached = None
+        with _llm_cache_lock:
+            entry = _llm_cache.get(cache_key)
+            if entry is not None:
+                if now - entry[0] < LLM_CACHE_TTL:
+                    cached = entry[1]
+                    _llm_cache.move_to_end(cache_key)
+                else:
+                    del _llm_cache[cache_key]
+        if cached is not None:
+            # Only verbose_log is modified, so copy that level and share the rest
+            result = dict(cached)
+            result['verbose_log'] = {**cached['verbose_log'], 'cache_hit': True}
+            return result
+        
         verbose_log = {
             "step": "initialization",
             "cloudflare_endpoint": "https://huihui-cognee-processor.scott-c93.workers.dev/api/ramble-thoughts",
             "model": model,
             "provider": provider,
             "input_text_length": len(text),
-            "input_text_preview": text[:200] + "..." if len(text) > 200 else text,
             "timestamp": time.time(),
             "request_prepared": False,
             "request_sent": False,
@@ -149,16 +308,12 @@ class handler(BaseHTTPRequestHandler):
             "error": None,
             "warnings": []
         }
+        if verbose:
+            verbose_log["input_text_preview"] = preview(text, 200)
         
         try:
-            import urllib.request
-            import urllib.parse
-            
             verbose_log["step"] = "preparing_request"
             
-            # Cloudflare endpoint for thought rambling
-            cloudflare_url = "https://huihui-cognee-processor.scott-c93.workers.dev/api/ramble-thoughts"
-            
             # Prepare request data matching Cloudflare API format
             request_data = {
                 "text": text,
@@ -175,23 +330,11 @@ class handler(BaseHTTPRequestHandler):
             }
             
             # Convert to JSON
-            json_data = json.dumps(request_data).encode('utf-8')
+            json_data = json_dumps(request_data)
             verbose_log["request_body_size"] = len(json_data)
             verbose_log["request_prepared"] = True
             
-            # Create request
-            headers = {
-                'Content-Type': 'application/json',
-                'User-Agent': 'ThoughtRambler/1.0',
-                'Accept': 'application/json'
-            }
-            
-            req = urllib.request.Request(
-                cloudflare_url,
-                data=json_data,
-                headers=headers
-            )
-            
+            headers = CLOUDFLARE_HEADERS
             verbose_log["request_headers"] = headers
             verbose_log["step"] = "sending_request"
             
@@ -200,31 +343,35 @@ class handler(BaseHTTPRequestHandler):
                 request_start_time = time.time()
                 verbose_log["request_start_time"] = request_start_time
                 
-                with urllib.request.urlopen(req, timeout=15) as response:
+                with cloudflare_post(json_data, headers) as response:
                     request_end_time = time.time()
                     verbose_log["request_duration"] = request_end_time - request_start_time
-                    verbose_log["response_status"] = response.getcode()
-                    verbose_log["response_headers"] = dict(response.headers)
+                    verbose_log["response_status"] = response.status
+                    if verbose:
+                        verbose_log["response_headers"] = dict(response.headers)
                     verbose_log["request_sent"] = True
                     verbose_log["response_received"] = True
                     
                     # Read response
-                    response_text = response.read().decode('utf-8')
-                    verbose_log["response_body_size"] = len(response_text)
-                    verbose_log["response_text_preview"] = response_text[:500] + "..." if len(response_text) > 500 else response_text
+                    response_body = response.read()
+                    verbose_log["response_body_size"] = len(response_body)
+                    if verbose:
+                        verbose_log["response_text_preview"] = preview(response_body, 500)
                     
                     verbose_log["step"] = "parsing_response"
                     
                     try:
-                        response_data = json.loads(response_text)
+                        response_data = json_loads(response_body)
                         verbose_log["response_parsed"] = True
                         verbose_log["response_json_keys"] = list(response_data.keys())
                         verbose_log["response_success"] = response_data.get('success', False)
                         
                         # Log full response structure for debugging
-                        verbose_log["cloudflare_response_full"] = response_data
+                        if verbose:
+                            # Pass the upstream bytes through verbatim rather than re-encoding the parsed copy
+                            verbose_log["cloudflare_response_full"] = RawJSON(response_body) if RawJSON else response_data
                         
-                    except json.JSONDecodeError as e:
+                    except ValueError as e:  # json/orjson decode errors and invalid UTF-8 all derive from it
                         verbose_log["error"] = f"JSON decode error: {str(e)}"
                         verbose_log["response_is_json"] = False
                         return {
@@ -240,34 +387,28 @@ class handler(BaseHTTPRequestHandler):
                         # Transform Cloudflare response to our format
                         thought_groups = response_data.get('thought_groups', [])
                         verbose_log["thought_groups_count"] = len(thought_groups)
-                        verbose_log["thought_groups_raw"] = thought_groups
+                        if verbose:
+                            verbose_log["thought_groups_raw"] = thought_groups
+                        
+                        if DEBUG and thought_groups:  # Log detailed info for first group
+                            first_group = thought_groups[0]
+                            verbose_log["first_group_detail"] = {
+                                "group_index": 0,
+                                "group_id": first_group.get('id', 1),
+                                "text_length": len(first_group.get('combined_text', '')),
+                                "theme": first_group.get('theme', 'general'),
+                                "confidence": first_group.get('confidence', 0.85),
+                                "emotional_tone": first_group.get('emotional_tone', 'neutral'),
+                                "original_segments_count": len(first_group.get('original_segments', []))
+                            }
                         
                         # Convert thought groups to our chunk format
                         chunks = []
                         for i, group in enumerate(thought_groups):
-                            # Extract keywords from the text (simple approach)
                             group_text = group.get('combined_text', '')
                             
-                            # Log each group processing
-                            group_log = {
-                                "group_index": i,
-                                "group_id": group.get('id', i + 1),
-                                "text_length": len(group_text),
-                                "theme": group.get('theme', 'general'),
-                                "confidence": group.get('confidence', 0.85),
-                                "emotional_tone": group.get('emotional_tone', 'neutral'),
-                                "original_segments_count": len(group.get('original_segments', [])),
-                                "raw_group": group
-                            }
-                            
-                            if i == 0:  # Log detailed info for first group
-                                verbose_log["first_group_detail"] = group_log
-                            
-                            # Extract meaningful words as keywords
-                            import re
-                            words = re.findall(r'\b[a-zA-Z]{3,}\b', group_text.lower())
-                            stop_words = {'the', 'and', 'but', 'for', 'with', 'this', 'that', 'was', 'are', 'have', 'you', 'they', 'she', 'her', 'his', 'him'}
-                            keywords = [w for w in words if w not in stop_words][:3]
+                            # Same keyword ranking as the rule-based chunks; the group's tone is used for sentiment
+                            keywords, _ = self.analyze_chunk(group_text)
                             
                             chunks.append({
                                 'id': group.get('id', i + 1),
@@ -297,13 +438,18 @@ class handler(BaseHTTPRequestHandler):
                         
                         verbose_log["cloudflare_metadata"] = cloudflare_metadata
                         
-                        return {
+                        result = {
                             'chunks': chunks,
                             'llm_processed': True,
                             'verbose_log': verbose_log,
                             'cloudflare_response': True,
                             **cloudflare_metadata
                         }
+                        with _llm_cache_lock:
+                            _llm_cache[cache_key] = (now, result)
+                            if len(_llm_cache) > LLM_CACHE_SIZE:
+                                _llm_cache.popitem(last=False)
+                        return result
                     else:
                         # Cloudflare request failed but got response
                         verbose_log["error"] = f"Cloudflare API returned success=false: {response_data.get('error', 'Unknown error')}"
@@ -355,8 +501,7 @@ class handler(BaseHTTPRequestHandler):
                 verbose_log["error_type"] = type(e).__name__
                 verbose_log["step"] = "request_exception"
                 
-                import traceback
-                verbose_log["traceback"] = traceback.format_exc()
+                logger.exception("Cloudflare request failed")
                 
                 return {
                     'chunks': [],
@@ -372,8 +517,7 @@ class handler(BaseHTTPRequestHandler):
             verbose_log["error_type"] = type(e).__name__
             verbose_log["step"] = "general_exception"
             
-            import traceback
-            verbose_log["traceback"] = traceback.format_exc()
+            logger.exception("Cloudflare LLM parsing failed")
             
             return {
                 'chunks': [],
@@ -419,12 +563,10 @@ class handler(BaseHTTPRequestHandler):
         """Basic rule-based thought parsing (same as regular endpoint)"""
         
         # Preprocessing
-        text = re.sub(r'\s+', ' ', text.strip())
-        text = re.sub(r'\b(um|uh|er|ah)\b', '', text, flags=re.IGNORECASE)
-        text = re.sub(r'\s+', ' ', text)
+        text = _DISFLUENCY_RE.sub('', _WS_RE.sub(' ', text.strip()))
         
         # Split into sentences
-        sentences = re.split(r'[.!?]+', text)
+        sentences = _SENT_RE.split(text)
         
         # Further split on conjunctions
         result = []
@@ -433,119 +575,120 @@ class handler(BaseHTTPRequestHandler):
             if not sentence:
                 continue
             
-            parts = re.split(r'\b(and|but|so|then)\b', sentence)
+            # Walk the conjunction matches and slice the text between them
+            matches = list(_CONJ_RE.finditer(sentence))
+            if not matches:
+                result.append(sentence)
+                continue
+            
             current_part = ""
-            for part in parts:
-                part = part.strip()
-                if not part:
-                    continue
-                
-                if part.lower() in ['and', 'but', 'so', 'then'] and current_part:
-                    result.append(current_part.strip())
+            prev_end = 0
+            for match in matches:
+                segment = sentence[prev_end:match.start()].strip()
+                prev_end = match.end()
+                if segment:
+                    # Capitalized conjunctions are not matched but still end a part
+                    if current_part and segment.lower() in _CONJUNCTIONS:
+                        result.append(current_part)
+                        current_part = ""
+                    else:
+                        current_part = current_part + " " + segment if current_part else segment
+                if current_part:
+                    result.append(current_part)
                     current_part = ""
                 else:
-                    current_part += " " + part if current_part else part
+                    # A leading conjunction stays attached to the text that follows it
+                    current_part = match.group()
             
-            if current_part.strip():
-                result.append(current_part.strip())
+            segment = sentence[prev_end:].strip()
+            if segment:
+                if current_part and segment.lower() in _CONJUNCTIONS:
+                    result.append(current_part)
+                    current_part = ""
+                else:
+                    current_part = current_part + " " + segment if current_part else segment
+            # Segments are stripped before joining, so current_part never needs re-stripping
+            if current_part:
+                result.append(current_part)
         
-        sentences = [s for s in result if len(s.strip()) > 10]
+        sentences = [s for s in result if len(s) > 10]
         
         # Create chunks with simple analysis
         chunks = []
-        current_chunk = []
-        
-        transition_markers = {
-            'temporal': ['then', 'next', 'after', 'before', 'meanwhile', 'now', 'later'],
-            'logical': ['but', 'however', 'although', 'though', 'nevertheless', 'anyway'],
-            'additive': ['also', 'additionally', 'furthermore', 'moreover'],
-            'topic_shift': ['speaking of', 'by the way', 'oh', 'wait', 'actually', 'I mean'],
-            'decision': ['I should', 'I need to', 'I have to', 'let me'],
-            'memory': ['I remember', 'I forgot', 'I was thinking', 'I realized']
-        }
+        chunk_start = 0  # Index of the first sentence in the open chunk
         
         for i, sentence in enumerate(sentences):
             should_split = False
             sentence_lower = sentence.lower()
             
             # Check for transition markers
-            for category, markers in transition_markers.items():
-                for marker in markers:
-                    if sentence_lower.startswith(marker) or f' {marker} ' in sentence_lower:
-                        should_split = True
-                        break
-                if should_split:
-                    break
+            if _TRANSITION_RE.search(sentence_lower):
+                should_split = True
             
-            # Check for other splitting conditions
-            if '?' in sentence or len(sentence.split()) > 15:
+            # Check for other splitting conditions (sentences are single-spaced, so
+            # counting spaces gives the word count without building a list)
+            if '?' in sentence or sentence.count(' ') > 14:
                 should_split = True
             
-            if i > 0 and should_split and current_chunk:
+            if i > 0 and should_split:
                 # Finalize current chunk
-                chunk_text = ' '.join(current_chunk)
+                chunk_text = ' '.join(sentences[chunk_start:i])
+                keywords, sentiment = self.analyze_chunk(chunk_text)
                 chunks.append({
                     'id': len(chunks) + 1,
                     'text': chunk_text,
                     'confidence': 0.85,
                     'start_char': 0,  # Simplified for now
                     'end_char': len(chunk_text),
-                    'topic_keywords': self.extract_keywords(chunk_text),
-                    'sentiment': self.analyze_sentiment(chunk_text)
+                    'topic_keywords': keywords,
+                    'sentiment': sentiment
                 })
-                current_chunk = [sentence]
-            else:
-                current_chunk.append(sentence)
+                chunk_start = i
         
         # Add final chunk
-        if current_chunk:
-            chunk_text = ' '.join(current_chunk)
+        if chunk_start < len(sentences):
+            chunk_text = ' '.join(sentences[chunk_start:])
+            keywords, sentiment = self.analyze_chunk(chunk_text)
             chunks.append({
                 'id': len(chunks) + 1,
                 'text': chunk_text,
                 'confidence': 0.85,
                 'start_char': 0,
                 'end_char': len(chunk_text),
-                'topic_keywords': self.extract_keywords(chunk_text),
-                'sentiment': self.analyze_sentiment(chunk_text)
+                'topic_keywords': keywords,
+                'sentiment': sentiment
             })
         
         return chunks
     
-    def analyze_sentiment(self, text):
-        """Basic sentiment analysis"""
-        positive_words = ['good', 'great', 'excellent', 'amazing', 'wonderful', 'happy', 'excited']
-        negative_words = ['bad', 'terrible', 'awful', 'horrible', 'sad', 'angry', 'frustrated']
+    def analyze_chunk(self, text):
+        """Extract keywords and basic sentiment from one tokenization of the text"""
+        words = _WORD_RE.findall(text.lower())
         
-        text_lower = text.lower()
-        positive_count = sum(1 for word in positive_words if word in text_lower)
-        negative_count = sum(1 for word in negative_words if word in text_lower)
+        # Sentiment counts each distinct positive/negative word once
+        unique_words = set(words)
+        positive_count = len(unique_words & _POS_WORDS)
+        negative_count = len(unique_words & _NEG_WORDS)
         
         if positive_count > negative_count:
-            return 'positive'
+            sentiment = 'positive'
         elif negative_count > positive_count:
-            return 'negative'
+            sentiment = 'negative'
         else:
-            return 'neutral'
-    
-    def extract_keywords(self, text):
-        """Extract important keywords from text"""
-        stop_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'from', 'about', 'i', 'me', 'my', 'we', 'you', 'they', 'it', 'is', 'are', 'was', 'were', 'be', 'been', 'have', 'has', 'had', 'do', 'did', 'will', 'would', 'could', 'should', 'can', 'this', 'that', 'these', 'those'}
-        
-        words = re.findall(r'\b[a-zA-Z]{3,}\b', text.lower())
-        word_freq = {}
+            sentiment = 'neutral'
         
-        for word in words:
-            if word not in stop_words and len(word) > 3:
-                word_freq[word] = word_freq.get(word, 0) + 1
+        word_freq = Counter(word for word in words if word not in _STOP_WORDS and len(word) > 3)
         
-        sorted_words = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)
-        keywords = [word for word, freq in sorted_words[:3]]
+        # most_common(3) picks the top 3 with a heap instead of sorting every word
+        keywords = [word for word, freq in word_freq.most_common(3)]
         
-        # Add capitalized words (names/places)
-        capitalized = re.findall(r'\b[A-Z][a-z]+\b', text)
-        for word in capitalized[:2]:
-            if word.lower() not in stop_words and word.lower() not in [k.lower() for k in keywords]:
+        # Add capitalized words (names/places); only the first two are ever considered
+        seen = {k.lower() for k in keywords}
+        for match in islice(_CAP_RE.finditer(text), 2):
+            word = match.group()
+            word_lower = word.lower()
+            if word_lower not in _STOP_WORDS and word_lower not in seen:
                 keywords.append(word)
+                seen.add(word_lower)
         
-        return keywords[:5]
\ No newline at end of file
+        return keywords[:5], sentiment
\ No newline at end of file
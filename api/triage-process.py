@@ -1,30 +1,39 @@
 """
 Vercel serverless function for text triage processing
 """
-from http.server import BaseHTTPRequestHandler
-import json
+import re
 import sys
 import os
 import traceback
 
+# Shared response helpers (api/_http.py)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _http import RawResponseHandler, json_dumps, json_loads, POST_HEADERS, POST_OPTIONS_HEADERS
+
 # Add backend to path so we can import triage modules
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
 
-class handler(BaseHTTPRequestHandler):
+# Simple patterns, compiled once per cold start.
+# Any match of (?:https?://)?(?:www\.)?(?:[a-zA-Z0-9-]+\.)+[a-zA-Z]{2,} contains a label
+# character, a dot and two letters, and that core is itself a match, so searching for the
+# core alone gives the same yes/no answer in linear time (the full pattern backtracks
+# quadratically on long unbroken words)
+_URL_RE = re.compile(r'[a-zA-Z0-9-]\.[a-zA-Z]{2}')
+# All TODO cues in one alternation so each chunk needs a single search
+_TODO_RE = re.compile(
+    r'\b(?:need to|have to|should|must)\s+'
+    r'|\b(?:todo|task|reminder):\s*'
+    r'|\b(?:don\'t forget|remember to)\s+'
+)
+_URGENT_RE = re.compile(r'urgent|asap|!!!')
+
+class handler(RawResponseHandler):
     def do_POST(self):
         try:
-            # Set CORS headers first
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
-            self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-            self.end_headers()
-            
             # Read request
             content_length = int(self.headers['Content-Length'])
             post_data = self.rfile.read(content_length)
-            request_data = json.loads(post_data.decode('utf-8'))
+            request_data = json_loads(post_data)
             
             text = request_data.get('text', '')
             
@@ -33,7 +42,7 @@ class handler(BaseHTTPRequestHandler):
             result = self.simple_triage(text)
             
             # Send response
-            self.wfile.write(json.dumps(result).encode())
+            self.send_raw_response(200, POST_HEADERS, json_dumps(result))
             
         except Exception as e:
             # Log the full error
@@ -55,34 +64,37 @@ class handler(BaseHTTPRequestHandler):
                     "recommendations": ["Error occurred during processing"]
                 }
             }
-            self.wfile.write(json.dumps(error_response).encode())
+            # Errors keep the 200 status; the client renders the summary's recommendations
+            self.send_raw_response(200, POST_HEADERS, json_dumps(error_response))
     
     def simple_triage(self, text):
         """Simplified triage for Vercel environment"""
-        import re
-        
-        # Split into chunks
-        chunks = text.split('\n')
-        chunks = [c.strip() for c in chunks if c.strip()]
+        # Split into chunks; each line is stripped once and empties dropped
+        chunks = [c for c in map(str.strip, text.split('\n')) if c]
         
         thoughts = []
         urls = []
         todos = []
         quarantine = []
         
-        # Simple patterns
-        url_pattern = r'(?:https?://)?(?:www\.)?(?:[a-zA-Z0-9-]+\.)+[a-zA-Z]{2,}'
-        todo_patterns = [
-            r'\b(?:need to|have to|should|must)\s+',
-            r'\b(?:todo|task|reminder):\s*',
-            r'\b(?:don\'t forget|remember to)\s+'
-        ]
-        
         for chunk in chunks:
+            chunk_len = len(chunk)
+            
+            # Check for gibberish first (very simple); a chunk this short or made of one
+            # repeated character can never match the URL or TODO patterns, so the
+            # cheap tests run before any regex
+            if chunk_len < 3 or chunk.count(chunk[0]) == chunk_len:
+                quarantine.append({
+                    'category': 'gibberish',
+                    'original_text': chunk,
+                    'issues': ['too_short' if chunk_len < 3 else 'repetitive']
+                })
+                continue
+            
             chunk_lower = chunk.lower()
             
             # Check for URLs
-            if re.search(url_pattern, chunk):
+            if _URL_RE.search(chunk):
                 urls.append({
                     'category': 'url',
                     'type': 'explicit',
@@ -91,21 +103,14 @@ class handler(BaseHTTPRequestHandler):
                     'confidence': 'high'
                 })
             # Check for TODOs
-            elif any(re.search(pattern, chunk_lower) for pattern in todo_patterns):
-                urgency = 'high' if any(word in chunk_lower for word in ['urgent', 'asap', '!!!']) else 'medium'
+            elif _TODO_RE.search(chunk_lower):
+                urgency = 'high' if _URGENT_RE.search(chunk_lower) else 'medium'
                 todos.append({
                     'category': 'todo',
                     'action': chunk,
                     'urgency': urgency,
                     'original_text': chunk
                 })
-            # Check for gibberish (very simple)
-            elif len(chunk) < 3 or chunk.count(chunk[0]) == len(chunk):
-                quarantine.append({
-                    'category': 'gibberish',
-                    'original_text': chunk,
-                    'issues': ['too_short' if len(chunk) < 3 else 'repetitive']
-                })
             # Otherwise it's a thought
             else:
                 thoughts.append({
@@ -141,8 +146,4 @@ class handler(BaseHTTPRequestHandler):
         }
     
     def do_OPTIONS(self):
-        self.send_response(200)
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.end_headers()
+        self.send_raw_response(200, POST_OPTIONS_HEADERS)
@@ -0,0 +1,68 @@
+"""
+Shared response helpers for the Vercel serverless functions
+(the leading underscore keeps Vercel from deploying this file as a function)
+"""
+from http.server import BaseHTTPRequestHandler
+import json
+
+try:
+    import orjson
+
+    def json_dumps(obj, pretty=False):
+        """Serialize to UTF-8 bytes (orjson returns bytes natively)"""
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0)
+
+    json_loads = orjson.loads
+    # Embeds already-encoded JSON in a document without re-serializing it (orjson >= 3.9)
+    RawJSON = getattr(orjson, 'Fragment', None)
+except ImportError:
+    # Fall back to stdlib json when orjson isn't installed
+    def json_dumps(obj, pretty=False):
+        """Serialize to UTF-8 bytes"""
+        return json.dumps(obj, indent=2 if pretty else None).encode()
+
+    def json_loads(data):
+        """Parse JSON from bytes, str or a memoryview (stdlib json rejects views)"""
+        return json.loads(bytes(data) if isinstance(data, memoryview) else data)
+
+    RawJSON = None
+
+def header_block(methods, content_type=True):
+    """Build a raw CORS header block; the status line and Content-Length are added per response"""
+    block = b"Content-Type: application/json\r\n" if content_type else b""
+    return block + (
+        b"Access-Control-Allow-Origin: *\r\n"
+        b"Access-Control-Allow-Methods: %s\r\n"
+        b"Access-Control-Allow-Headers: Content-Type\r\n"
+    ) % methods.encode()
+
+POST_HEADERS = header_block('POST, OPTIONS')
+POST_OPTIONS_HEADERS = header_block('POST, OPTIONS', content_type=False)
+GET_HEADERS = header_block('GET, OPTIONS')
+GET_OPTIONS_HEADERS = header_block('GET, OPTIONS', content_type=False)
+ERROR_HEADERS = (
+    b"Content-Type: application/json\r\n"
+    b"Access-Control-Allow-Origin: *\r\n"
+)
+
+# Bodies larger than this are written in slices so the kernel can start sending early
+WRITE_CHUNK_SIZE = 65536
+
+class RawResponseHandler(BaseHTTPRequestHandler):
+    """Request handler that writes whole responses from precomputed header blocks"""
+
+    def send_raw_response(self, code, headers, body=b''):
+        """Write status line, precomputed headers and Content-Length, then the body"""
+        self.log_request(code)
+        head = b'%s %d %s\r\n%sContent-Length: %d\r\n\r\n' % (
+            self.protocol_version.encode(), code, self.responses[code][0].encode(), headers, len(body)
+        )
+        if len(body) <= WRITE_CHUNK_SIZE:
+            self.wfile.write(head + body)
+            return
+        # Large bodies go out as slices of the serialized bytes rather than being
+        # copied into one status+headers+body buffer first
+        self.wfile.write(head)
+        view = memoryview(body)
+        for i in range(0, len(body), WRITE_CHUNK_SIZE):
+            self.wfile.write(view[i:i + WRITE_CHUNK_SIZE])
@@ -3,13 +3,29 @@ Shared library for thought parsing functionality
 """
 import re
 import logging
-from typing import List, Dict, Any
+from collections import Counter
+from typing import List, Dict, Any, Tuple
 from pydantic import BaseModel
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Precompiled patterns used by SimpleThoughtParser
+_WS_RE = re.compile(r'\s+')
+_FILLER_RE = re.compile(r'\b(um|uh|er|ah)\b', re.IGNORECASE)
+_SENT_RE = re.compile(r'[.!?]+')
+_CONJ_RE = re.compile(r'\b(and|but|so|then)\b')
+_WORD_RE = re.compile(r'\b[a-zA-Z]{3,}\b')
+_CAP_RE = re.compile(r'\b[A-Z][a-z]+\b')
+
+# Common stop words to filter out of keywords, built once per cold start
+_STOP_WORDS = frozenset({'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'from', 'about', 'through', 'during', 'before', 'after', 'above', 'below', 'between', 'among', 'through', 'during', 'before', 'after', 'above', 'below', 'up', 'down', 'out', 'off', 'over', 'under', 'again', 'further', 'then', 'once', 'here', 'there', 'when', 'where', 'why', 'how', 'all', 'any', 'both', 'each', 'few', 'more', 'most', 'other', 'some', 'such', 'no', 'nor', 'not', 'only', 'own', 'same', 'so', 'than', 'too', 'very', 'can', 'will', 'just', 'should', 'now', 'i', 'me', 'my', 'myself', 'we', 'our', 'ours', 'ourselves', 'you', 'your', 'yours', 'yourself', 'yourselves', 'he', 'him', 'his', 'himself', 'she', 'her', 'hers', 'herself', 'it', 'its', 'itself', 'they', 'them', 'their', 'theirs', 'themselves', 'what', 'which', 'who', 'whom', 'this', 'that', 'these', 'those', 'am', 'is', 'are', 'was', 'were', 'be', 'been', 'being', 'have', 'has', 'had', 'having', 'do', 'does', 'did', 'doing', 'would', 'could', 'should'})
+
+# Sentiment word lists
+_POS_WORDS = frozenset({'good', 'great', 'excellent', 'amazing', 'wonderful', 'happy', 'excited'})
+_NEG_WORDS = frozenset({'bad', 'terrible', 'awful', 'horrible', 'sad', 'angry', 'frustrated'})
+
 # Request/Response models
 class ThoughtParseRequest(BaseModel):
     text: str
@@ -43,6 +59,10 @@ class SimpleThoughtParser:
             'decision': ['I should', 'I need to', 'I have to', 'let me'],
             'memory': ['I remember', 'I forgot', 'I was thinking', 'I realized']
         }
+        # One alternation over every marker, matched at the start of the sentence or
+        # between spaces, so a sentence is checked with a single search
+        marker_alt = '|'.join(re.escape(marker) for markers in self.transition_markers.values() for marker in markers)
+        self._marker_re = re.compile(rf'^(?:{marker_alt})| (?:{marker_alt}) ')
         
     def parse_thoughts(self, text: str, provider: str = "openai", model: str = "gpt-3.5-turbo") -> List[Dict[str, Any]]:
         """Parse rambling text into coherent thought chunks using rule-based approach"""
@@ -54,7 +74,7 @@ class SimpleThoughtParser:
         sentences = self._split_sentences(text)
         
         # Advanced thought chunk detection using multiple strategies
-        chunks = self._detect_thought_boundaries(sentences, text)
+        chunks = self._detect_thought_boundaries(sentences)
         
         # Enhance chunks with basic analysis
         enhanced_chunks = self._enhance_with_analysis(chunks, provider, model)
@@ -64,53 +84,66 @@ class SimpleThoughtParser:
     def _preprocess_text(self, text: str) -> str:
         """Clean and normalize input text"""
         # Remove extra whitespaces
-        text = re.sub(r'\s+', ' ', text.strip())
+        text = _WS_RE.sub(' ', text.strip())
         
         # Handle common speech patterns
-        text = re.sub(r'\b(um|uh|er|ah)\b', '', text, flags=re.IGNORECASE)
-        text = re.sub(r'\s+', ' ', text)  # Clean up spaces again
+        text = _FILLER_RE.sub('', text)
+        text = _WS_RE.sub(' ', text)  # Clean up spaces again
         
         return text
     
-    def _split_sentences(self, text: str) -> List[str]:
-        """Simple sentence splitting using punctuation and conjunctions"""
-        # Split on periods, exclamations, questions
-        sentences = re.split(r'[.!?]+', text)
+    def _split_sentences(self, text: str) -> List[Tuple[str, int]]:
+        """Simple sentence splitting using punctuation and conjunctions, keeping each piece's start offset"""
+        # Split on periods, exclamations, questions, remembering where each piece starts
+        spans = []
+        pos = 0
+        for match in _SENT_RE.finditer(text):
+            spans.append((pos, match.start()))
+            pos = match.end()
+        spans.append((pos, len(text)))
         
         # Further split on strong transition markers
         result = []
-        for sentence in sentences:
-            sentence = sentence.strip()
+        for start, end in spans:
+            raw_sentence = text[start:end]
+            sentence = raw_sentence.strip()
             if not sentence:
                 continue
             
-            # Split on strong conjunctions
-            parts = re.split(r'\b(and|but|so|then)\b', sentence)
+            # Split on strong conjunctions; the pieces concatenate back to the sentence,
+            # so a running offset tracks where each one starts
+            parts = _CONJ_RE.split(sentence)
+            offset = start + len(raw_sentence) - len(raw_sentence.lstrip())
             
             current_part = ""
-            for i, part in enumerate(parts):
-                part = part.strip()
+            current_start = offset
+            for i, raw_part in enumerate(parts):
+                part = raw_part.strip()
+                part_start = offset + len(raw_part) - len(raw_part.lstrip())
+                offset += len(raw_part)
                 if not part:
                     continue
                 
                 if part.lower() in ['and', 'but', 'so', 'then'] and current_part:
-                    result.append(current_part.strip())
+                    result.append((current_part.strip(), current_start))
                     current_part = ""
                 else:
+                    if not current_part:
+                        current_start = part_start
                     current_part += " " + part if current_part else part
             
             if current_part.strip():
-                result.append(current_part.strip())
+                result.append((current_part.strip(), current_start))
         
-        return [s for s in result if len(s.strip()) > 10]  # Filter out very short segments
+        return [(s, start) for s, start in result if len(s.strip()) > 10]  # Filter out very short segments
     
-    def _detect_thought_boundaries(self, sentences: List[str], original_text: str) -> List[Dict[str, Any]]:
+    def _detect_thought_boundaries(self, sentences: List[Tuple[str, int]]) -> List[Dict[str, Any]]:
         """Detect thought boundaries using linguistic cues in sentences"""
         chunks = []
         current_chunk = []
         current_start = 0
         
-        for i, sentence in enumerate(sentences):
+        for i, (sentence, sentence_start) in enumerate(sentences):
             sentence_text = sentence.strip()
             
             # Check for transition markers
@@ -128,9 +161,9 @@ class SimpleThoughtParser:
                         'sentence_count': len(current_chunk)
                     })
                     
-                # Start new chunk
+                # Start new chunk at the offset recorded while splitting
                 current_chunk = [sentence_text]
-                current_start = original_text.find(sentence_text, current_start)
+                current_start = sentence_start
             else:
                 current_chunk.append(sentence_text)
         
@@ -148,20 +181,19 @@ class SimpleThoughtParser:
     
     def _should_split_here(self, sentence_text: str) -> bool:
         """Determine if we should split at this sentence"""
-        sentence_lower = sentence_text.lower()
-        
-        # Check for explicit transition markers
-        for category, markers in self.transition_markers.items():
-            for marker in markers:
-                if sentence_lower.startswith(marker) or f' {marker} ' in sentence_lower:
-                    return True
-        
+        # Cheap checks first; the marker scan only runs when neither fires
         # Check for question-to-statement transitions
         if '?' in sentence_text:
             return True
             
-        # Check for very long sentences (often contain multiple thoughts)
-        if len(sentence_text.split()) > 15:
+        # Check for very long sentences (often contain multiple thoughts); sentences come
+        # from single-spaced preprocessed text, so counting spaces gives the word count
+        # without building a list
+        if sentence_text.count(' ') > 14:
+            return True
+        
+        # Check for explicit transition markers
+        if self._marker_re.search(sentence_text.lower()):
             return True
             
         return False
@@ -171,11 +203,8 @@ class SimpleThoughtParser:
         enhanced_chunks = []
         
         for i, chunk in enumerate(chunks):
-            # Basic sentiment analysis using keyword matching
-            sentiment = self._analyze_sentiment(chunk['text'])
-            
-            # Extract keywords using simple frequency analysis
-            keywords = self._extract_keywords(chunk['text'])
+            # Basic sentiment and frequency-based keywords from one pass over the text
+            sentiment, keywords = self._analyze_chunk(chunk['text'])
             
             enhanced_chunk = {
                 'id': i + 1,
@@ -191,49 +220,41 @@ class SimpleThoughtParser:
         
         return enhanced_chunks
     
-    def _analyze_sentiment(self, text: str) -> str:
-        """Basic sentiment analysis"""
-        # This is a placeholder - in production, you'd use the LLM API
-        positive_words = ['good', 'great', 'excellent', 'amazing', 'wonderful', 'happy', 'excited']
-        negative_words = ['bad', 'terrible', 'awful', 'horrible', 'sad', 'angry', 'frustrated']
+    def _analyze_chunk(self, text: str) -> Tuple[str, List[str]]:
+        """Basic sentiment and keyword analysis from a single tokenization of the text"""
+        words = _WORD_RE.findall(text.lower())
         
-        text_lower = text.lower()
-        positive_count = sum(1 for word in positive_words if word in text_lower)
-        negative_count = sum(1 for word in negative_words if word in text_lower)
+        # Sentiment: this is a placeholder - in production, you'd use the LLM API
+        # Match whole words only, so "goodness" no longer counts as "good"
+        unique_words = set(words)
+        positive_count = len(unique_words & _POS_WORDS)
+        negative_count = len(unique_words & _NEG_WORDS)
         
         if positive_count > negative_count:
-            return 'positive'
+            sentiment = 'positive'
         elif negative_count > positive_count:
-            return 'negative'
+            sentiment = 'negative'
         else:
-            return 'neutral'
-    
-    def _extract_keywords(self, text: str) -> List[str]:
-        """Extract important keywords from text using simple analysis"""
-        # Common stop words to filter out
-        stop_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'from', 'about', 'through', 'during', 'before', 'after', 'above', 'below', 'between', 'among', 'through', 'during', 'before', 'after', 'above', 'below', 'up', 'down', 'out', 'off', 'over', 'under', 'again', 'further', 'then', 'once', 'here', 'there', 'when', 'where', 'why', 'how', 'all', 'any', 'both', 'each', 'few', 'more', 'most', 'other', 'some', 'such', 'no', 'nor', 'not', 'only', 'own', 'same', 'so', 'than', 'too', 'very', 'can', 'will', 'just', 'should', 'now', 'i', 'me', 'my', 'myself', 'we', 'our', 'ours', 'ourselves', 'you', 'your', 'yours', 'yourself', 'yourselves', 'he', 'him', 'his', 'himself', 'she', 'her', 'hers', 'herself', 'it', 'its', 'itself', 'they', 'them', 'their', 'theirs', 'themselves', 'what', 'which', 'who', 'whom', 'this', 'that', 'these', 'those', 'am', 'is', 'are', 'was', 'were', 'be', 'been', 'being', 'have', 'has', 'had', 'having', 'do', 'does', 'did', 'doing', 'would', 'could', 'should'}
-        
-        # Simple keyword extraction
-        words = re.findall(r'\b[a-zA-Z]{3,}\b', text.lower())
-        keywords = []
-        
-        # Count word frequencies
-        word_freq = {}
-        for word in words:
-            if word not in stop_words and len(word) > 3:
-                word_freq[word] = word_freq.get(word, 0) + 1
-        
-        # Sort by frequency and take top words
-        sorted_words = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)
-        keywords = [word for word, freq in sorted_words[:5]]
-        
-        # Also look for capitalized words (likely names/places)
-        capitalized = re.findall(r'\b[A-Z][a-z]+\b', text)
-        for word in capitalized:
-            if word.lower() not in stop_words and word.lower() not in [k.lower() for k in keywords]:
+            sentiment = 'neutral'
+        
+        # Keywords: count word frequencies over the same tokens
+        word_freq = Counter(word for word in words if word not in _STOP_WORDS and len(word) > 3)
+        
+        # most_common(5) picks the top words with a heap instead of sorting every word
+        keywords = [word for word, freq in word_freq.most_common(5)]
+        
+        # Also look for capitalized words (likely names/places), stopping once five are found
+        seen = {k.lower() for k in keywords}
+        for match in _CAP_RE.finditer(text):
+            if len(keywords) >= 5:
+                break
+            word = match.group()
+            word_lower = word.lower()
+            if word_lower not in _STOP_WORDS and word_lower not in seen:
                 keywords.append(word)
+                seen.add(word_lower)
         
-        return keywords[:5]  # Return top 5 unique keywords
+        return sentiment, keywords  # Top 5 unique keywords
 
 
 # Initialize global parser instance
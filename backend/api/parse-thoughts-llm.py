@@ -1,47 +1,186 @@
-from http.server import BaseHTTPRequestHandler
-import json
 import re
 import time
 import logging
 import os
 import sys
+import hashlib
+import threading
+from collections import OrderedDict
+from itertools import islice
 from typing import List, Dict, Any, Optional
 
+# Shared response helpers (backend/api/_http.py)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _http import RawResponseHandler, json_dumps, json_loads, POST_HEADERS, ERROR_HEADERS, POST_OPTIONS_HEADERS
+
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-try:
-    import spacy
-    from spacy.tokens import Doc
-    from spacy_llm.util import assemble
+from chunk_overlap import content_words, has_overlap
+
+# spaCy, spacy-llm and the Gemma loader are imported on the first LLM-enabled request
+# rather than at cold start, so basic-only requests never pay for loading them
+SPACY_AVAILABLE = False
+_spacy_state = {'loaded': False}
+_spacy_lock = threading.Lock()
+
+def _ensure_spacy() -> bool:
+    """Import the spacy-llm components once and report whether they are available"""
+    global SPACY_AVAILABLE, get_gemma_model, GemmaModel, merge_related_chunks, ChunkRelationship
+    
+    if _spacy_state['loaded']:
+        return SPACY_AVAILABLE
     
-    # Import our custom components
-    from models.gemma_loader import get_gemma_model, GemmaModel
-    from spacy_llm_tasks.chunk_relationship import merge_related_chunks, ChunkRelationship
+    # Concurrent first requests wait for the import instead of seeing a half-done load
+    with _spacy_lock:
+        if not _spacy_state['loaded']:
+            try:
+                import spacy
+                from spacy.tokens import Doc
+                from spacy_llm.util import assemble
+                
+                # Import our custom components
+                from models.gemma_loader import get_gemma_model, GemmaModel
+                from spacy_llm_tasks.chunk_relationship import merge_related_chunks, ChunkRelationship
+                
+                SPACY_AVAILABLE = True
+            except ImportError as e:
+                logging.warning(f"spacy-llm components not available: {e}")
+            # Set last, so the unlocked check above only passes once the globals are in place
+            _spacy_state['loaded'] = True
     
-    SPACY_AVAILABLE = True
-except ImportError as e:
-    SPACY_AVAILABLE = False
-    logging.warning(f"spacy-llm components not available: {e}")
+    return SPACY_AVAILABLE
+
+# Patterns used by the basic parser, compiled once per container
+_WS_RE = re.compile(r'\s+')
+# A filler word plus the space before it when a space follows, so no double space is left
+# behind and the second whitespace pass can go. (One alternation regex covering both
+# whitespace and fillers would need a Python callback per match, which measured slower.)
+_DISFLUENCY_RE = re.compile(r' (?:um|uh|er|ah)\b(?= )|\b(?:um|uh|er|ah)\b', re.IGNORECASE)
+_SENT_RE = re.compile(r'[.!?]+')
+_CONJ_RE = re.compile(r'\b(and|but|so|then)\b')
+_WORD_RE = re.compile(r'\b[a-zA-Z]{3,}\b')
+_CONJUNCTIONS = frozenset({'and', 'but', 'so', 'then'})
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class handler(BaseHTTPRequestHandler):
+# Requests above this are refused with 413 before any of the body is read
+MAX_BODY_SIZE = 2_000_000
+
+# Gemma responses keyed by a hash of the pair prompt, so re-parsed text skips the model
+RELATIONSHIP_CACHE_SIZE = 512
+_relationship_cache = OrderedDict()
+_relationship_cache_lock = threading.Lock()
+
+# Basic parsing depends only on the text, so resubmitted inputs skip the regex work.
+# Keys are digests rather than the text itself, and texts above the size limit are not
+# cached, so the cache stays small however large the accepted bodies get
+BASIC_CACHE_SIZE = 128
+BASIC_CACHE_MAX_TEXT = 20_000
+_basic_cache = OrderedDict()
+_basic_cache_lock = threading.Lock()
+
+def _basic_chunks(text: str) -> tuple:
+    """Split text into basic chunks (cached by a digest of the input text)"""
+    if len(text) > BASIC_CACHE_MAX_TEXT:
+        return _split_basic_chunks(text)
+    
+    key = hashlib.blake2b(text.encode(), digest_size=16).digest()
+    with _basic_cache_lock:
+        cached = _basic_cache.get(key)
+        if cached is not None:
+            _basic_cache.move_to_end(key)
+            return cached
+    
+    chunks = _split_basic_chunks(text)
+    with _basic_cache_lock:
+        _basic_cache[key] = chunks
+        if len(_basic_cache) > BASIC_CACHE_SIZE:
+            _basic_cache.popitem(last=False)
+    return chunks
+
+def _split_basic_chunks(text: str) -> tuple:
+    """Split text into basic chunks"""
+    
+    # Preprocessing
+    text = _DISFLUENCY_RE.sub('', _WS_RE.sub(' ', text.strip()))
+    
+    # Split into sentences
+    sentences = _SENT_RE.split(text)
+    
+    # Further split on conjunctions
+    result = []
+    for sentence in sentences:
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        
+        # Walk the conjunction matches and slice the text between them
+        matches = list(_CONJ_RE.finditer(sentence))
+        if not matches:
+            result.append(sentence)
+            continue
+        
+        current_part = ""
+        prev_end = 0
+        for match in matches:
+            segment = sentence[prev_end:match.start()].strip()
+            prev_end = match.end()
+            if segment:
+                # Capitalized conjunctions are not matched but still end a part
+                if current_part and segment.lower() in _CONJUNCTIONS:
+                    result.append(current_part)
+                    current_part = ""
+                else:
+                    current_part = current_part + " " + segment if current_part else segment
+            if current_part:
+                result.append(current_part)
+                current_part = ""
+            else:
+                # A leading conjunction stays attached to the text that follows it
+                current_part = match.group()
+        
+        segment = sentence[prev_end:].strip()
+        if segment:
+            if current_part and segment.lower() in _CONJUNCTIONS:
+                result.append(current_part)
+                current_part = ""
+            else:
+                current_part = current_part + " " + segment if current_part else segment
+        if current_part:
+            result.append(current_part)
+    
+    # Create chunks with metadata
+    chunks = []
+    for i, chunk_text in enumerate(result):
+        if chunk_text:
+            # Basic keyword extraction (stop after the first three matches)
+            keywords = [match.group().lower() for match in islice(_WORD_RE.finditer(chunk_text), 3)]
+            
+            chunk = {
+                'id': i + 1,
+                'text': chunk_text,
+                'confidence': 0.85,
+                'start_char': 0,  # Simplified for basic parsing
+                'end_char': len(chunk_text),
+                'topic_keywords': keywords,
+                'sentiment': 'neutral'
+            }
+            chunks.append(chunk)
+    
+    return tuple(chunks)
+
+class handler(RawResponseHandler):
     def do_POST(self):
         try:
-            # Set CORS headers
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
-            self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-            self.end_headers()
-            
             # Read and parse request
-            content_length = int(self.headers['Content-Length'])
+            content_length = int(self.headers.get('Content-Length') or 0)
+            if content_length > MAX_BODY_SIZE:
+                self.send_raw_response(413, ERROR_HEADERS, json_dumps({"error": "Request body too large"}))
+                return
             post_data = self.rfile.read(content_length)
-            request_data = json.loads(post_data.decode('utf-8'))
+            request_data = json_loads(post_data)
             
             text = request_data.get('text', '').strip()
             provider = request_data.get('provider', 'openai')
@@ -49,13 +188,14 @@ class handler(BaseHTTPRequestHandler):
             enable_llm = request_data.get('enable_llm', True)
             
             if not text:
-                self.send_error(400, "Text input cannot be empty")
+                self.send_raw_response(400, ERROR_HEADERS, json_dumps({"error": "Text input cannot be empty"}))
                 return
             
             # Parse thoughts with LLM enhancement
             start_time = time.time()
             
-            if SPACY_AVAILABLE and enable_llm:
+            llm_enhanced = bool(enable_llm) and _ensure_spacy()
+            if llm_enhanced:
                 chunks = self.parse_thoughts_with_llm(text, provider, model)
             else:
                 # Fallback to basic parsing
@@ -73,30 +213,20 @@ class handler(BaseHTTPRequestHandler):
                     "input_length": len(text),
                     "provider": provider,
                     "model": model,
-                    "llm_enhanced": SPACY_AVAILABLE and enable_llm,
+                    "llm_enhanced": llm_enhanced,
                     "average_chunk_length": sum(len(chunk['text']) for chunk in chunks) / len(chunks) if chunks else 0
                 }
             }
             
-            self.wfile.write(json.dumps(response).encode())
+            self.send_raw_response(200, POST_HEADERS, json_dumps(response))
             
         except Exception as e:
             logger.error(f"Error in LLM processing: {e}")
-            self.send_response(500)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            
             error_response = {"error": f"Error processing text with LLM: {str(e)}"}
-            self.wfile.write(json.dumps(error_response).encode())
+            self.send_raw_response(500, ERROR_HEADERS, json_dumps(error_response))
     
     def do_OPTIONS(self):
-        self.send_response(200)
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.end_headers()
-        self.wfile.write(b'')
+        self.send_raw_response(200, POST_OPTIONS_HEADERS)
     
     def parse_thoughts_with_llm(self, text: str, provider: str = "openai", model: str = "gpt-3.5-turbo") -> List[Dict[str, Any]]:
         """Parse thoughts using spacy-llm with Gemma for chunk relationship detection"""
@@ -138,27 +268,66 @@ class handler(BaseHTTPRequestHandler):
                 logger.warning("Gemma model not available, skipping relationship detection")
                 return chunks
             
-            # Analyze relationships between chunks
-            relationships = []
+            # Collect prompts for every pair so the model sees them in one batched call
+            pair_keys = []
+            pair_ids = []
+            pending = {}  # Uncached prompts by cache key, each sent to the model once
+            responses_by_key = {}
+            
+            # Content words per chunk, for a cheap overlap check before any prompt is built
+            word_sets = [content_words(chunk['text']) for chunk in chunks]
             
             for i, chunk1 in enumerate(chunks):
                 for j in range(i + 1, min(i + 4, len(chunks))):  # Check within 3-chunk window
                     chunk2 = chunks[j]
                     
+                    if not has_overlap(word_sets[i], word_sets[j]):
+                        continue
+                    
                     # Create prompt for relationship detection
                     prompt = self.create_relationship_prompt(chunk1['text'], chunk2['text'])
+                    key = hashlib.blake2b(prompt.encode(), digest_size=16).digest()
+                    pair_keys.append(key)
+                    pair_ids.append((i, j))
                     
-                    try:
-                        response = gemma([prompt])[0]
-                        relationship = self.parse_relationship_response(response, i, j)
-                        
-                        if relationship and relationship.confidence >= 0.7:
-                            relationships.append(relationship)
-                            logger.info(f"Found relationship between chunks {i} and {j}: {relationship.relationship_type} (confidence: {relationship.confidence})")
+                    if key not in responses_by_key and key not in pending:
+                        with _relationship_cache_lock:
+                            cached = _relationship_cache.get(key)
+                            if cached is not None:
+                                _relationship_cache.move_to_end(key)
+                        if cached is not None:
+                            responses_by_key[key] = cached
+                        else:
+                            pending[key] = prompt
+            
+            if pending:
+                # GemmaModel splits the list into batch_size groups internally
+                generated = gemma(list(pending.values()))
+                for key, response in zip(pending, generated):
+                    responses_by_key[key] = response
+                    # Empty responses mean generation failed, so they are not cached
+                    if response:
+                        with _relationship_cache_lock:
+                            _relationship_cache[key] = response
+                            if len(_relationship_cache) > RELATIONSHIP_CACHE_SIZE:
+                                _relationship_cache.popitem(last=False)
+            
+            responses = [responses_by_key[key] for key in pair_keys]
+            
+            # Analyze relationships between chunks
+            relationships = []
+            
+            for (i, j), response in zip(pair_ids, responses):
+                try:
+                    relationship = self.parse_relationship_response(response, i, j)
                     
-                    except Exception as e:
-                        logger.warning(f"Failed to analyze chunk relationship {i}-{j}: {e}")
-                        continue
+                    if relationship and relationship.confidence >= 0.7:
+                        relationships.append(relationship)
+                        logger.info(f"Found relationship between chunks {i} and {j}: {relationship.relationship_type} (confidence: {relationship.confidence})")
+                
+                except Exception as e:
+                    logger.warning(f"Failed to analyze chunk relationship {i}-{j}: {e}")
+                    continue
             
             # Merge related chunks
             if relationships:
@@ -196,7 +365,7 @@ RELATIONSHIP: SAME_PERSON
 CONFIDENCE: 0.95
 REASONING: Both segments discuss the same boss and her behavior."""
 
-    def parse_relationship_response(self, response: str, chunk1_id: int, chunk2_id: int) -> Optional[ChunkRelationship]:
+    def parse_relationship_response(self, response: str, chunk1_id: int, chunk2_id: int) -> Optional['ChunkRelationship']:
         """Parse Gemma's response to extract relationship information"""
         try:
             lines = [line.strip() for line in response.strip().split('\n') if line.strip()]
@@ -224,54 +393,5 @@ REASONING: Both segments discuss the same boss and her behavior."""
     
     def parse_thoughts_basic(self, text: str, provider: str = "openai", model: str = "gpt-3.5-turbo") -> List[Dict[str, Any]]:
         """Basic thought parsing (fallback when LLM is not available)"""
-        
-        # Preprocessing
-        text = re.sub(r'\s+', ' ', text.strip())
-        text = re.sub(r'\b(um|uh|er|ah)\b', '', text, flags=re.IGNORECASE)
-        text = re.sub(r'\s+', ' ', text)
-        
-        # Split into sentences
-        sentences = re.split(r'[.!?]+', text)
-        
-        # Further split on conjunctions
-        result = []
-        for sentence in sentences:
-            sentence = sentence.strip()
-            if not sentence:
-                continue
-            
-            parts = re.split(r'\b(and|but|so|then)\b', sentence)
-            current_part = ""
-            for part in parts:
-                part = part.strip()
-                if not part:
-                    continue
-                
-                if part.lower() in ['and', 'but', 'so', 'then'] and current_part:
-                    result.append(current_part.strip())
-                    current_part = ""
-                else:
-                    current_part += " " + part if current_part else part
-            
-            if current_part.strip():
-                result.append(current_part.strip())
-        
-        # Create chunks with metadata
-        chunks = []
-        for i, chunk_text in enumerate(result):
-            if chunk_text:
-                # Basic keyword extraction
-                keywords = [word.lower() for word in re.findall(r'\b[a-zA-Z]{3,}\b', chunk_text)][:3]
-                
-                chunk = {
-                    'id': i + 1,
-                    'text': chunk_text,
-                    'confidence': 0.85,
-                    'start_char': 0,  # Simplified for basic parsing
-                    'end_char': len(chunk_text),
-                    'topic_keywords': keywords,
-                    'sentiment': 'neutral'
-                }
-                chunks.append(chunk)
-        
-        return chunks
\ No newline at end of file
+        # Copy the cached chunk dicts so callers never mutate the cache
+        return [{**chunk, 'topic_keywords': list(chunk['topic_keywords'])} for chunk in _basic_chunks(text)]
\ No newline at end of file
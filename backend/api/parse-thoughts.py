@@ -1,35 +1,65 @@
-from http.server import BaseHTTPRequestHandler
-import json
 import re
 import time
 import sys
 import os
+import logging
+import traceback
+from collections import Counter
+from itertools import islice
 
 # Ensure we don't import the main app by accident
 sys.path = [path for path in sys.path if 'backend' not in path or 'api' in path]
 
-class handler(BaseHTTPRequestHandler):
+# Shared response helpers (backend/api/_http.py)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _http import RawResponseHandler, json_dumps, json_loads, POST_HEADERS, ERROR_HEADERS, POST_OPTIONS_HEADERS
+
+logger = logging.getLogger(__name__)
+
+# 500 tracebacks are only returned to the client when DEBUG is set in the environment
+DEBUG = os.environ.get('DEBUG', '').lower() in ('1', 'true', 'yes')
+
+# Patterns used by the rule-based parser, compiled once per container
+_WS_RE = re.compile(r'\s+')
+# A filler word plus the space before it when a space follows, so no double space is left behind
+_DISFLUENCY_RE = re.compile(r' (?:um|uh|er|ah)\b(?= )|\b(?:um|uh|er|ah)\b', re.IGNORECASE)
+_SENT_RE = re.compile(r'[.!?]+')
+_CONJ_RE = re.compile(r'\b(and|but|so|then)\b')
+_WORD_RE = re.compile(r'\b[a-zA-Z]{3,}\b')
+_CAP_RE = re.compile(r'\b[A-Z][a-z]+\b')
+
+# Word lists as frozensets for O(1) membership checks
+_CONJUNCTIONS = frozenset({'and', 'but', 'so', 'then'})
+_STOP_WORDS = frozenset({'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'from', 'about', 'i', 'me', 'my', 'we', 'you', 'they', 'it', 'is', 'are', 'was', 'were', 'be', 'been', 'have', 'has', 'had', 'do', 'did', 'will', 'would', 'could', 'should', 'can', 'this', 'that', 'these', 'those'})
+_POS_WORDS = frozenset({'good', 'great', 'excellent', 'amazing', 'wonderful', 'happy', 'excited'})
+_NEG_WORDS = frozenset({'bad', 'terrible', 'awful', 'horrible', 'sad', 'angry', 'frustrated'})
+
+_TRANSITION_MARKERS = {
+    'temporal': ['then', 'next', 'after', 'before', 'meanwhile', 'now', 'later'],
+    'logical': ['but', 'however', 'although', 'though', 'nevertheless', 'anyway'],
+    'additive': ['also', 'additionally', 'furthermore', 'moreover'],
+    'topic_shift': ['speaking of', 'by the way', 'oh', 'wait', 'actually', 'I mean'],
+    'decision': ['I should', 'I need to', 'I have to', 'let me'],
+    'memory': ['I remember', 'I forgot', 'I was thinking', 'I realized']
+}
+# One scan per sentence: a marker at the start of the sentence, or as a space-delimited phrase inside it
+_MARKER_ALT = '|'.join(re.escape(marker) for markers in _TRANSITION_MARKERS.values() for marker in markers)
+_TRANSITION_RE = re.compile(rf'^(?:{_MARKER_ALT})| (?:{_MARKER_ALT}) ')
+
+class handler(RawResponseHandler):
     def do_POST(self):
         try:
-            # Set CORS headers
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
-            self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-            self.end_headers()
-            
             # Read and parse request
             content_length = int(self.headers['Content-Length'])
             post_data = self.rfile.read(content_length)
-            request_data = json.loads(post_data.decode('utf-8'))
+            request_data = json_loads(post_data)
             
             text = request_data.get('text', '').strip()
             provider = request_data.get('provider', 'openai')
             model = request_data.get('model', 'gpt-3.5-turbo')
             
             if not text:
-                self.send_error(400, "Text input cannot be empty")
+                self.send_raw_response(400, ERROR_HEADERS, json_dumps({"error": "Text input cannot be empty"}))
                 return
             
             # Parse thoughts using rule-based approach
@@ -50,41 +80,31 @@ class handler(BaseHTTPRequestHandler):
                 }
             }
             
-            self.wfile.write(json.dumps(response).encode())
+            # Serialized in one call, so the headers can carry the exact Content-Length
+            self.send_raw_response(200, POST_HEADERS, json_dumps(response))
             
         except Exception as e:
-            self.send_response(500)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            
-            # Provide detailed error information for debugging
-            import traceback
+            # The traceback goes to the function logs; the client gets the short form
+            logger.exception("parse-thoughts request failed")
             error_response = {
                 "error": f"Error processing text: {str(e)}", 
-                "type": type(e).__name__,
-                "traceback": traceback.format_exc()
+                "type": type(e).__name__
             }
-            self.wfile.write(json.dumps(error_response).encode())
+            if DEBUG:
+                error_response["traceback"] = traceback.format_exc()
+            self.send_raw_response(500, ERROR_HEADERS, json_dumps(error_response))
     
     def do_OPTIONS(self):
-        self.send_response(200)
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.end_headers()
-        self.wfile.write(b'')
+        self.send_raw_response(200, POST_OPTIONS_HEADERS)
     
     def parse_thoughts(self, text, provider="openai", model="gpt-3.5-turbo"):
         """Parse rambling text into coherent thought chunks using rule-based approach"""
         
         # Preprocessing
-        text = re.sub(r'\s+', ' ', text.strip())
-        text = re.sub(r'\b(um|uh|er|ah)\b', '', text, flags=re.IGNORECASE)
-        text = re.sub(r'\s+', ' ', text)
+        text = _DISFLUENCY_RE.sub('', _WS_RE.sub(' ', text.strip()))
         
         # Split into sentences
-        sentences = re.split(r'[.!?]+', text)
+        sentences = _SENT_RE.split(text)
         
         # Further split on conjunctions
         result = []
@@ -93,52 +113,59 @@ class handler(BaseHTTPRequestHandler):
             if not sentence:
                 continue
             
-            parts = re.split(r'\b(and|but|so|then)\b', sentence)
+            # Walk the conjunction matches and slice the text between them
+            matches = list(_CONJ_RE.finditer(sentence))
+            if not matches:
+                result.append(sentence)
+                continue
+            
             current_part = ""
-            for part in parts:
-                part = part.strip()
-                if not part:
-                    continue
-                
-                if part.lower() in ['and', 'but', 'so', 'then'] and current_part:
-                    result.append(current_part.strip())
+            prev_end = 0
+            for match in matches:
+                segment = sentence[prev_end:match.start()].strip()
+                prev_end = match.end()
+                if segment:
+                    # Capitalized conjunctions are not matched but still end a part
+                    if current_part and segment.lower() in _CONJUNCTIONS:
+                        result.append(current_part)
+                        current_part = ""
+                    else:
+                        current_part = current_part + " " + segment if current_part else segment
+                if current_part:
+                    result.append(current_part)
                     current_part = ""
                 else:
-                    current_part += " " + part if current_part else part
+                    # A leading conjunction stays attached to the text that follows it
+                    current_part = match.group()
             
-            if current_part.strip():
-                result.append(current_part.strip())
+            segment = sentence[prev_end:].strip()
+            if segment:
+                if current_part and segment.lower() in _CONJUNCTIONS:
+                    result.append(current_part)
+                    current_part = ""
+                else:
+                    current_part = current_part + " " + segment if current_part else segment
+            # Segments are stripped before joining, so current_part never needs re-stripping
+            if current_part:
+                result.append(current_part)
         
-        sentences = [s for s in result if len(s.strip()) > 10]
+        sentences = [s for s in result if len(s) > 10]
         
         # Create chunks with simple analysis
         chunks = []
         current_chunk = []
         
-        transition_markers = {
-            'temporal': ['then', 'next', 'after', 'before', 'meanwhile', 'now', 'later'],
-            'logical': ['but', 'however', 'although', 'though', 'nevertheless', 'anyway'],
-            'additive': ['also', 'additionally', 'furthermore', 'moreover'],
-            'topic_shift': ['speaking of', 'by the way', 'oh', 'wait', 'actually', 'I mean'],
-            'decision': ['I should', 'I need to', 'I have to', 'let me'],
-            'memory': ['I remember', 'I forgot', 'I was thinking', 'I realized']
-        }
-        
         for i, sentence in enumerate(sentences):
             should_split = False
             sentence_lower = sentence.lower()
             
             # Check for transition markers
-            for category, markers in transition_markers.items():
-                for marker in markers:
-                    if sentence_lower.startswith(marker) or f' {marker} ' in sentence_lower:
-                        should_split = True
-                        break
-                if should_split:
-                    break
+            if _TRANSITION_RE.search(sentence_lower):
+                should_split = True
             
-            # Check for other splitting conditions
-            if '?' in sentence or len(sentence.split()) > 15:
+            # Check for other splitting conditions (sentences are single-spaced, so
+            # counting spaces gives the word count without building a list)
+            if '?' in sentence or sentence.count(' ') > 14:
                 should_split = True
             
             if i > 0 and should_split and current_chunk:
@@ -174,12 +201,10 @@ class handler(BaseHTTPRequestHandler):
     
     def analyze_sentiment(self, text):
         """Basic sentiment analysis"""
-        positive_words = ['good', 'great', 'excellent', 'amazing', 'wonderful', 'happy', 'excited']
-        negative_words = ['bad', 'terrible', 'awful', 'horrible', 'sad', 'angry', 'frustrated']
-        
-        text_lower = text.lower()
-        positive_count = sum(1 for word in positive_words if word in text_lower)
-        negative_count = sum(1 for word in negative_words if word in text_lower)
+        # Match whole words only, as the other endpoints do, so "goodness" is not "good"
+        words = set(_WORD_RE.findall(text.lower()))
+        positive_count = len(words & _POS_WORDS)
+        negative_count = len(words & _NEG_WORDS)
         
         if positive_count > negative_count:
             return 'positive'
@@ -190,22 +215,18 @@ class handler(BaseHTTPRequestHandler):
     
     def extract_keywords(self, text):
         """Extract important keywords from text"""
-        stop_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'from', 'about', 'i', 'me', 'my', 'we', 'you', 'they', 'it', 'is', 'are', 'was', 'were', 'be', 'been', 'have', 'has', 'had', 'do', 'did', 'will', 'would', 'could', 'should', 'can', 'this', 'that', 'these', 'those'}
-        
-        words = re.findall(r'\b[a-zA-Z]{3,}\b', text.lower())
-        word_freq = {}
-        
-        for word in words:
-            if word not in stop_words and len(word) > 3:
-                word_freq[word] = word_freq.get(word, 0) + 1
+        word_freq = Counter(word for word in _WORD_RE.findall(text.lower()) if word not in _STOP_WORDS and len(word) > 3)
         
-        sorted_words = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)
-        keywords = [word for word, freq in sorted_words[:3]]
+        # most_common(3) picks the top 3 with a heap instead of sorting every word
+        keywords = [word for word, freq in word_freq.most_common(3)]
         
-        # Add capitalized words (names/places)
-        capitalized = re.findall(r'\b[A-Z][a-z]+\b', text)
-        for word in capitalized[:2]:
-            if word.lower() not in stop_words and word.lower() not in [k.lower() for k in keywords]:
+        # Add capitalized words (names/places); only the first two are ever considered
+        seen = {k.lower() for k in keywords}
+        for match in islice(_CAP_RE.finditer(text), 2):
+            word = match.group()
+            word_lower = word.lower()
+            if word_lower not in _STOP_WORDS and word_lower not in seen:
                 keywords.append(word)
+                seen.add(word_lower)
         
         return keywords[:5]
\ No newline at end of file
@@ -3,13 +3,33 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 import re
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 import logging
 
+from chunk_overlap import content_words, has_overlap
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Precompiled patterns and word lists shared by every parse call
+_WS_RE = re.compile(r'\s+')
+_FILLER_RE = re.compile(r'\b(um|uh|er|ah)\b', re.IGNORECASE)
+_SEGMENT_RE = re.compile(r'[^.!?]+')  # runs of text between sentence punctuation
+_CONJ_RE = re.compile(r'\b(and|but|so|then)\b')
+_WORD_RE = re.compile(r'\b[a-zA-Z]{3,}\b')
+_CAP_RE = re.compile(r'\b[A-Z][a-z]+\b')
+
+# Relationship response fields, each matched on its own line so their order doesn't matter
+# and an echoed "[SAME_TOPIC|...]" template line is skipped
+_REL_RE = re.compile(r'^[ \t]*RELATIONSHIP:[ \t]*(\w+)', re.MULTILINE | re.IGNORECASE)
+_CONF_RE = re.compile(r'^[ \t]*CONFIDENCE:[ \t]*(\d*\.?\d+)', re.MULTILINE | re.IGNORECASE)
+_REL_LABELS = frozenset({'SAME_TOPIC', 'SAME_PERSON', 'SAME_EVENT', 'CAUSE_EFFECT', 'TEMPORAL', 'TEMPORAL_SEQUENCE', 'NONE'})
+
+_STOP = frozenset({'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'from', 'about', 'through', 'during', 'before', 'after', 'above', 'below', 'between', 'among', 'through', 'during', 'before', 'after', 'above', 'below', 'up', 'down', 'out', 'off', 'over', 'under', 'again', 'further', 'then', 'once', 'here', 'there', 'when', 'where', 'why', 'how', 'all', 'any', 'both', 'each', 'few', 'more', 'most', 'other', 'some', 'such', 'no', 'nor', 'not', 'only', 'own', 'same', 'so', 'than', 'too', 'very', 'can', 'will', 'just', 'should', 'now', 'i', 'me', 'my', 'myself', 'we', 'our', 'ours', 'ourselves', 'you', 'your', 'yours', 'yourself', 'yourselves', 'he', 'him', 'his', 'himself', 'she', 'her', 'hers', 'herself', 'it', 'its', 'itself', 'they', 'them', 'their', 'theirs', 'themselves', 'what', 'which', 'who', 'whom', 'this', 'that', 'these', 'those', 'am', 'is', 'are', 'was', 'were', 'be', 'been', 'being', 'have', 'has', 'had', 'having', 'do', 'does', 'did', 'doing', 'would', 'could', 'should'})
+_POS = frozenset({'good', 'great', 'excellent', 'amazing', 'wonderful', 'happy', 'excited'})
+_NEG = frozenset({'bad', 'terrible', 'awful', 'horrible', 'sad', 'angry', 'frustrated'})
+
 app = FastAPI(title="Thought Ramble Parser", description="API for parsing human thought rambles using advanced NLP")
 
 # Import and include triage routes
@@ -17,9 +37,27 @@ try:
     from triage.api_routes import router as triage_router
     app.include_router(triage_router)
     logger.info("Triage routes loaded successfully")
-except ImportError as e:
+except Exception as e:
+    # A broken optional router must not keep the core parser from starting
     logger.warning(f"Could not load triage routes: {e}")
 
+# Import LLM relationship components once at startup so requests don't pay for it
+try:
+    from models.gemma_loader import get_gemma_model
+    from spacy_llm_tasks.chunk_relationship import merge_related_chunks, ChunkRelationship
+except ImportError as e:
+    get_gemma_model = None
+    logger.warning(f"LLM components not available: {e}")
+
+# Model loading can fail in many ways (missing weights, CUDA/OOM, bad config);
+# any of them only disables the LLM path instead of the whole app
+_GEMMA = None
+if get_gemma_model is not None:
+    try:
+        _GEMMA = get_gemma_model()
+    except Exception as e:
+        logger.warning(f"Gemma model failed to load, falling back to basic parsing: {e}")
+
 # CORS configuration for frontend integration
 app.add_middleware(
     CORSMiddleware,
@@ -88,7 +126,7 @@ class SimpleThoughtParser:
         sentences = self._split_sentences(text)
         
         # Advanced thought chunk detection using multiple strategies
-        chunks = self._detect_thought_boundaries(sentences, text)
+        chunks = self._detect_thought_boundaries(sentences)
         
         # Enhance chunks with basic analysis
         enhanced_chunks = self._enhance_with_analysis(chunks, provider, model)
@@ -98,55 +136,52 @@ class SimpleThoughtParser:
     def _preprocess_text(self, text: str) -> str:
         """Clean and normalize input text"""
         # Remove extra whitespaces
-        text = re.sub(r'\s+', ' ', text.strip())
+        text = _WS_RE.sub(' ', text.strip())
         
         # Handle common speech patterns
-        text = re.sub(r'\b(um|uh|er|ah)\b', '', text, flags=re.IGNORECASE)
-        text = re.sub(r'\s+', ' ', text)  # Clean up spaces again
+        text = _FILLER_RE.sub('', text)
+        text = _WS_RE.sub(' ', text)  # Clean up spaces again
         
         return text
     
-    def _split_sentences(self, text: str) -> List[str]:
-        """Simple sentence splitting using punctuation and conjunctions"""
-        # Split on periods, exclamations, questions
-        sentences = re.split(r'[.!?]+', text)
-        
-        # Further split on strong transition markers
+    def _split_sentences(self, text: str) -> List[Tuple[str, int]]:
+        """Simple sentence splitting using punctuation and conjunctions, keeping start offsets"""
         result = []
-        for sentence in sentences:
-            sentence = sentence.strip()
-            if not sentence:
-                continue
-            
-            # Split on strong conjunctions
-            parts = re.split(r'\b(and|but|so|then)\b', sentence)
+        # Walk the runs between periods, exclamations, questions
+        for match in _SEGMENT_RE.finditer(text):
+            offset = match.start()
             
+            # Split on strong conjunctions, tracking where each part starts
             current_part = ""
-            for i, part in enumerate(parts):
+            current_start = offset
+            for part in _CONJ_RE.split(match.group()):
+                part_start = offset + len(part) - len(part.lstrip())
+                offset += len(part)
                 part = part.strip()
                 if not part:
                     continue
                 
                 if part.lower() in ['and', 'but', 'so', 'then'] and current_part:
-                    result.append(current_part.strip())
+                    result.append((current_part, current_start))
                     current_part = ""
+                elif current_part:
+                    current_part += " " + part
                 else:
-                    current_part += " " + part if current_part else part
+                    current_part = part
+                    current_start = part_start
             
-            if current_part.strip():
-                result.append(current_part.strip())
+            if current_part:
+                result.append((current_part, current_start))
         
-        return [s for s in result if len(s.strip()) > 10]  # Filter out very short segments
+        return [(s, start) for s, start in result if len(s) > 10]  # Filter out very short segments
     
-    def _detect_thought_boundaries(self, sentences: List[str], original_text: str) -> List[Dict[str, Any]]:
+    def _detect_thought_boundaries(self, sentences: List[Tuple[str, int]]) -> List[Dict[str, Any]]:
         """Detect thought boundaries using linguistic cues in sentences"""
         chunks = []
         current_chunk = []
         current_start = 0
         
-        for i, sentence in enumerate(sentences):
-            sentence_text = sentence.strip()
-            
+        for i, (sentence_text, sentence_start) in enumerate(sentences):
             # Check for transition markers
             should_split = self._should_split_here(sentence_text)
             
@@ -164,7 +199,7 @@ class SimpleThoughtParser:
                     
                 # Start new chunk
                 current_chunk = [sentence_text]
-                current_start = original_text.find(sentence_text, current_start)
+                current_start = sentence_start
             else:
                 current_chunk.append(sentence_text)
         
@@ -228,12 +263,10 @@ class SimpleThoughtParser:
     def _analyze_sentiment(self, text: str) -> str:
         """Basic sentiment analysis"""
         # This is a placeholder - in production, you'd use the LLM API
-        positive_words = ['good', 'great', 'excellent', 'amazing', 'wonderful', 'happy', 'excited']
-        negative_words = ['bad', 'terrible', 'awful', 'horrible', 'sad', 'angry', 'frustrated']
-        
-        text_lower = text.lower()
-        positive_count = sum(1 for word in positive_words if word in text_lower)
-        negative_count = sum(1 for word in negative_words if word in text_lower)
+        # Match whole words only, so "goodness" no longer counts as "good"
+        words = set(_WORD_RE.findall(text.lower()))
+        positive_count = len(words & _POS)
+        negative_count = len(words & _NEG)
         
         if positive_count > negative_count:
             return 'positive'
@@ -244,17 +277,14 @@ class SimpleThoughtParser:
     
     def _extract_keywords(self, text: str) -> List[str]:
         """Extract important keywords from text using simple analysis"""
-        # Common stop words to filter out
-        stop_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'from', 'about', 'through', 'during', 'before', 'after', 'above', 'below', 'between', 'among', 'through', 'during', 'before', 'after', 'above', 'below', 'up', 'down', 'out', 'off', 'over', 'under', 'again', 'further', 'then', 'once', 'here', 'there', 'when', 'where', 'why', 'how', 'all', 'any', 'both', 'each', 'few', 'more', 'most', 'other', 'some', 'such', 'no', 'nor', 'not', 'only', 'own', 'same', 'so', 'than', 'too', 'very', 'can', 'will', 'just', 'should', 'now', 'i', 'me', 'my', 'myself', 'we', 'our', 'ours', 'ourselves', 'you', 'your', 'yours', 'yourself', 'yourselves', 'he', 'him', 'his', 'himself', 'she', 'her', 'hers', 'herself', 'it', 'its', 'itself', 'they', 'them', 'their', 'theirs', 'themselves', 'what', 'which', 'who', 'whom', 'this', 'that', 'these', 'those', 'am', 'is', 'are', 'was', 'were', 'be', 'been', 'being', 'have', 'has', 'had', 'having', 'do', 'does', 'did', 'doing', 'would', 'could', 'should'}
-        
         # Simple keyword extraction
-        words = re.findall(r'\b[a-zA-Z]{3,}\b', text.lower())
+        words = _WORD_RE.findall(text.lower())
         keywords = []
         
         # Count word frequencies
         word_freq = {}
         for word in words:
-            if word not in stop_words and len(word) > 3:
+            if word not in _STOP and len(word) > 3:
                 word_freq[word] = word_freq.get(word, 0) + 1
         
         # Sort by frequency and take top words
@@ -262,20 +292,21 @@ class SimpleThoughtParser:
         keywords = [word for word, freq in sorted_words[:5]]
         
         # Also look for capitalized words (likely names/places)
-        capitalized = re.findall(r'\b[A-Z][a-z]+\b', text)
+        capitalized = _CAP_RE.findall(text)
         for word in capitalized:
-            if word.lower() not in stop_words and word.lower() not in [k.lower() for k in keywords]:
+            if word.lower() not in _STOP and word.lower() not in [k.lower() for k in keywords]:
                 keywords.append(word)
         
         return keywords[:5]  # Return top 5 unique keywords
 
 # Initialize the parser
 parser = None
+parser_failed = False  # Construction is deterministic, so a failure is not retried per request
 
 def get_parser():
     """Get or initialize parser instance (serverless-friendly)"""
-    global parser
-    if parser is None:
+    global parser, parser_failed
+    if parser is None and not parser_failed:
         try:
             logger.info("Initializing SimpleThoughtParser...")
             parser = SimpleThoughtParser()
@@ -284,7 +315,7 @@ def get_parser():
             logger.error(f"Failed to initialize thought parser: {e}")
             import traceback
             logger.error(f"Full traceback: {traceback.format_exc()}")
-            return None
+            parser_failed = True
     return parser
 
 @app.on_event("startup")
@@ -326,6 +357,7 @@ async def parse_thoughts(request: ThoughtParseRequest):
         
         # Convert to response format
         thought_chunks = [ThoughtChunk(**chunk) for chunk in chunks]
+        total_len = sum(len(chunk['text']) for chunk in chunks)  # 'text' is always set by the parser
         
         response = ThoughtParseResponse(
             chunks=thought_chunks,
@@ -335,7 +367,7 @@ async def parse_thoughts(request: ThoughtParseRequest):
                 "input_length": len(request.text),
                 "provider": request.provider,
                 "model": request.model,
-                "average_chunk_length": sum(len(chunk.text) for chunk in thought_chunks) / len(thought_chunks) if thought_chunks else 0
+                "average_chunk_length": total_len / len(chunks) if chunks else 0
             }
         )
         
@@ -359,35 +391,35 @@ async def parse_thoughts_llm(request: ThoughtParseRequest):
         import time
         start_time = time.time()
         
+        # Parse once; the LLM pass refines these chunks and they are the fallback otherwise
+        basic_chunks = current_parser.parse_thoughts(request.text, request.provider, request.model)
+        
         # Check if LLM enhancement is enabled and available
         llm_available = False
         enhanced_chunks = []
         
         if request.enable_llm:
             try:
-                from models.gemma_loader import get_gemma_model
-                from spacy_llm_tasks.chunk_relationship import merge_related_chunks, ChunkRelationship
-                
-                gemma = get_gemma_model()
-                if gemma.is_available():
+                if _GEMMA is None:
+                    logger.warning("LLM components not available, falling back to basic parsing")
+                elif _GEMMA.is_available():
                     llm_available = True
                     logger.info("LLM enhancement enabled - using Gemma for relationship detection")
-                    enhanced_chunks = await parse_thoughts_with_llm_sync(request.text, request.provider, request.model, parser)
+                    enhanced_chunks = await parse_thoughts_with_llm_sync(basic_chunks)
                 else:
                     logger.warning("Gemma model not available, falling back to basic parsing")
-            except ImportError as e:
-                logger.warning(f"LLM components not available: {e}")
             except Exception as e:
                 logger.error(f"LLM enhancement failed: {e}")
         
-        # Fallback to basic parsing if LLM is disabled or failed
+        # Fallback to the basic chunks if LLM is disabled or failed
         if not enhanced_chunks:
-            enhanced_chunks = current_parser.parse_thoughts(request.text, request.provider, request.model)
+            enhanced_chunks = basic_chunks
         
         processing_time = time.time() - start_time
         
         # Convert to response format
         thought_chunks = [ThoughtChunk(**chunk) for chunk in enhanced_chunks]
+        total_len = sum(len(chunk['text']) for chunk in enhanced_chunks)  # 'text' is always set by the parser
         
         response = ThoughtParseResponse(
             chunks=thought_chunks,
@@ -398,7 +430,7 @@ async def parse_thoughts_llm(request: ThoughtParseRequest):
                 "provider": request.provider,
                 "model": request.model,
                 "llm_enhanced": llm_available and request.enable_llm,
-                "average_chunk_length": sum(len(chunk.text) for chunk in thought_chunks) / len(thought_chunks) if thought_chunks else 0
+                "average_chunk_length": total_len / len(enhanced_chunks) if enhanced_chunks else 0
             }
         )
         
@@ -408,40 +440,43 @@ async def parse_thoughts_llm(request: ThoughtParseRequest):
         logger.error(f"Error in LLM-enhanced parsing: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error processing text with LLM: {str(e)}")
 
-async def parse_thoughts_with_llm_sync(text: str, provider: str, model: str, parser) -> List[Dict[str, Any]]:
-    """Synchronous wrapper for LLM-enhanced parsing"""
+async def parse_thoughts_with_llm_sync(basic_chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Synchronous wrapper for LLM-enhanced parsing of already-parsed basic chunks"""
     try:
-        from models.gemma_loader import get_gemma_model
-        from spacy_llm_tasks.chunk_relationship import merge_related_chunks, ChunkRelationship
-        
-        # Step 1: Get basic chunks
-        basic_chunks = current_parser.parse_thoughts(text, provider, model)
-        
+        # Step 1: Basic chunks come from the caller's single parse
         if len(basic_chunks) < 2:
             return basic_chunks
         
         # Step 2: Use Gemma for relationship detection
-        gemma = get_gemma_model()
+        # Cheap lexical pre-filter first: pairs with too little content-word overlap skip the LLM
+        word_sets = [content_words(chunk['text']) for chunk in basic_chunks]
+        pairs = [
+            (i, j)
+            for i in range(len(basic_chunks))
+            for j in range(i + 1, min(i + 4, len(basic_chunks)))  # Check within 3-chunk window
+            if has_overlap(word_sets[i], word_sets[j])
+        ]
+        if not pairs:
+            logger.info("No chunk pairs passed the lexical pre-filter")
+            return basic_chunks
+        
+        prompts = [create_relationship_prompt(basic_chunks[i]['text'], basic_chunks[j]['text']) for i, j in pairs]
+        
+        # Send every pair to the model in one batched call
+        responses = _GEMMA(prompts)
         relationships = []
         
-        for i, chunk1 in enumerate(basic_chunks):
-            for j in range(i + 1, min(i + 4, len(basic_chunks))):  # Check within 3-chunk window
-                chunk2 = basic_chunks[j]
-                
-                # Create relationship prompt
-                prompt = create_relationship_prompt(chunk1['text'], chunk2['text'])
-                
-                try:
-                    response = gemma([prompt])[0]
-                    relationship = parse_relationship_response(response, i, j)
-                    
-                    if relationship and relationship.confidence >= 0.7:
-                        relationships.append(relationship)
-                        logger.info(f"Found relationship: {i}-{j} ({relationship.relationship_type}, {relationship.confidence})")
+        for (i, j), response in zip(pairs, responses):
+            try:
+                relationship = parse_relationship_response(response, i, j)
                 
-                except Exception as e:
-                    logger.warning(f"Failed to analyze relationship {i}-{j}: {e}")
-                    continue
+                if relationship and relationship.confidence >= 0.7:
+                    relationships.append(relationship)
+                    logger.info(f"Found relationship: {i}-{j} ({relationship.relationship_type}, {relationship.confidence})")
+            
+            except Exception as e:
+                logger.warning(f"Failed to analyze relationship {i}-{j}: {e}")
+                continue
         
         # Step 3: Merge related chunks
         if relationships:
@@ -455,12 +490,11 @@ async def parse_thoughts_with_llm_sync(text: str, provider: str, model: str, par
         logger.error(f"LLM processing failed: {e}")
         return basic_chunks
 
-def create_relationship_prompt(chunk1_text: str, chunk2_text: str) -> str:
-    """Create a prompt for relationship analysis"""
-    return f"""Analyze if these two text segments are related:
+# Static relationship prompt; only the two segments are substituted per pair
+_REL_PROMPT = """Analyze if these two text segments are related:
 
-Segment 1: "{chunk1_text}"
-Segment 2: "{chunk2_text}"
+Segment 1: "{a}"
+Segment 2: "{b}"
 
 Consider if they discuss the same topic, person, event, or are causally related.
 
@@ -472,26 +506,23 @@ Example:
 RELATIONSHIP: SAME_PERSON
 CONFIDENCE: 0.95"""
 
+def create_relationship_prompt(chunk1_text: str, chunk2_text: str) -> str:
+    """Create a prompt for relationship analysis"""
+    return _REL_PROMPT.format(a=chunk1_text, b=chunk2_text)
+
 def parse_relationship_response(response: str, chunk1_id: int, chunk2_id: int):
     """Parse Gemma's response for relationship information"""
     try:
-        from spacy_llm_tasks.chunk_relationship import ChunkRelationship
-        
-        lines = [line.strip() for line in response.strip().split('\n') if line.strip()]
-        
-        relationship_type = "NONE"
-        confidence = 0.0
+        # The last line of each kind wins, as with a line-by-line read
+        labels = _REL_RE.findall(response)
+        confidences = _CONF_RE.findall(response)
+        if not labels or not confidences:
+            return None
         
-        for line in lines:
-            if line.startswith("RELATIONSHIP:"):
-                relationship_type = line.split(":", 1)[1].strip()
-            elif line.startswith("CONFIDENCE:"):
-                try:
-                    confidence = float(line.split(":", 1)[1].strip())
-                except ValueError:
-                    confidence = 0.0
+        relationship_type = labels[-1].upper()
+        confidence = float(confidences[-1])
         
-        if relationship_type != "NONE" and confidence > 0:
+        if relationship_type in _REL_LABELS and relationship_type != "NONE" and confidence > 0:
             return ChunkRelationship(chunk1_id, chunk2_id, confidence, relationship_type)
             
     except Exception as e:
@@ -0,0 +1,22 @@
+"""
+Lexical pre-filter for chunk relationship detection
+Shared by the FastAPI app and the serverless LLM handler so both send the same pairs to Gemma
+"""
+
+import re
+from typing import FrozenSet
+
+_WORD_RE = re.compile(r'\b[a-zA-Z]{3,}\b')
+_STOP_WORDS = frozenset({'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'from', 'about', 'through', 'during', 'before', 'after', 'above', 'below', 'between', 'among', 'up', 'down', 'out', 'off', 'over', 'under', 'again', 'further', 'then', 'once', 'here', 'there', 'when', 'where', 'why', 'how', 'all', 'any', 'both', 'each', 'few', 'more', 'most', 'other', 'some', 'such', 'no', 'nor', 'not', 'only', 'own', 'same', 'so', 'than', 'too', 'very', 'can', 'will', 'just', 'should', 'now', 'i', 'me', 'my', 'myself', 'we', 'our', 'ours', 'ourselves', 'you', 'your', 'yours', 'yourself', 'yourselves', 'he', 'him', 'his', 'himself', 'she', 'her', 'hers', 'herself', 'it', 'its', 'itself', 'they', 'them', 'their', 'theirs', 'themselves', 'what', 'which', 'who', 'whom', 'this', 'that', 'these', 'those', 'am', 'is', 'are', 'was', 'were', 'be', 'been', 'being', 'have', 'has', 'had', 'having', 'do', 'does', 'did', 'doing', 'would', 'could'})
+
+# Pairs whose content words overlap less than this (Jaccard) are never sent to the model
+RELATIONSHIP_MIN_OVERLAP = 0.05
+
+def content_words(text: str) -> FrozenSet[str]:
+    """Lowercased words of three or more letters, minus stop words"""
+    return frozenset(_WORD_RE.findall(text.lower())) - _STOP_WORDS
+
+def has_overlap(words_a: FrozenSet[str], words_b: FrozenSet[str], threshold: float = RELATIONSHIP_MIN_OVERLAP) -> bool:
+    """Check whether two chunks share enough content words to be worth a relationship check"""
+    union = len(words_a | words_b)
+    return bool(union) and len(words_a & words_b) / union >= threshold
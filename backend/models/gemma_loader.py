@@ -15,6 +15,12 @@ except ImportError:
     HF_AVAILABLE = False
     logging.warning("HuggingFace transformers not available. LLM features disabled.")
 
+try:
+    # Older transformers releases lack it; they still take the plain load_in_8bit kwarg
+    from transformers import BitsAndBytesConfig
+except ImportError:
+    BitsAndBytesConfig = None
+
 logger = logging.getLogger(__name__)
 
 class GemmaModel:
@@ -26,15 +32,21 @@ class GemmaModel:
         cache_dir: Optional[str] = None,
         device: str = "cpu",
         quantization: bool = True,
+        quantization_bits: int = 8,
+        cpu_int8: bool = False,
         max_new_tokens: int = 100,
         temperature: float = 0.3,
+        batch_size: int = 8,
     ):
         self.model_name = model_name
         self.cache_dir = cache_dir or self._get_cache_dir()
         self.device = device
         self.quantization = quantization
+        self.quantization_bits = quantization_bits
+        self.cpu_int8 = cpu_int8
         self.max_new_tokens = max_new_tokens
         self.temperature = temperature
+        self.batch_size = batch_size
         
         self._model = None
         self._tokenizer = None
@@ -70,6 +82,11 @@ class GemmaModel:
                 trust_remote_code=True
             )
             
+            # Batched generation with a decoder-only model needs left padding
+            self._tokenizer.padding_side = "left"
+            if self._tokenizer.pad_token is None:
+                self._tokenizer.pad_token = self._tokenizer.eos_token
+            
             # Configure model loading parameters
             model_kwargs = {
                 "cache_dir": self.cache_dir,
@@ -78,9 +95,20 @@ class GemmaModel:
                 "trust_remote_code": True,
             }
             
-            # Add quantization if enabled and not on CPU
+            # Add quantization if enabled and not on CPU (bitsandbytes needs CUDA)
             if self.quantization and self.device != "cpu":
-                model_kwargs["load_in_8bit"] = True
+                if BitsAndBytesConfig is None:
+                    if self.quantization_bits == 4:
+                        logger.warning("BitsAndBytesConfig not available, loading 8-bit instead of 4-bit")
+                    model_kwargs["load_in_8bit"] = True
+                elif self.quantization_bits == 4:
+                    model_kwargs["quantization_config"] = BitsAndBytesConfig(
+                        load_in_4bit=True,
+                        bnb_4bit_quant_type="nf4",
+                        bnb_4bit_compute_dtype=torch.float16,
+                    )
+                else:
+                    model_kwargs["quantization_config"] = BitsAndBytesConfig(load_in_8bit=True)
             
             # Load model
             self._model = AutoModelForCausalLM.from_pretrained(
@@ -88,6 +116,13 @@ class GemmaModel:
                 **model_kwargs
             )
             
+            # On CPU, optionally swap the Linear layers for dynamic int8 ones
+            # (opt-in: it changes generation output slightly)
+            if self.cpu_int8 and self.device == "cpu":
+                self._model = torch.quantization.quantize_dynamic(
+                    self._model, {torch.nn.Linear}, dtype=torch.qint8
+                )
+            
             # Create text generation pipeline
             self._pipeline = pipeline(
                 "text-generation",
@@ -117,11 +152,11 @@ class GemmaModel:
             self._load_model()
         
         try:
+            # Generate all responses in batches rather than one prompt at a time
+            results = self._pipeline(prompts, batch_size=self.batch_size)
+            
             responses = []
-            for prompt in prompts:
-                # Generate response
-                result = self._pipeline(prompt)
-                
+            for result in results:
                 if result and len(result) > 0:
                     response = result[0]['generated_text'].strip()
                     responses.append(response)
@@ -169,6 +204,8 @@ if HF_AVAILABLE:
         cache_dir: Optional[str] = None,
         device: str = "cpu",
         quantization: bool = True,
+        quantization_bits: int = 8,
+        cpu_int8: bool = False,
         max_new_tokens: int = 100,
         temperature: float = 0.3,
     ) -> GemmaModel:
@@ -178,6 +215,8 @@ if HF_AVAILABLE:
             cache_dir=cache_dir,
             device=device,
             quantization=quantization,
+            quantization_bits=quantization_bits,
+            cpu_int8=cpu_int8,
             max_new_tokens=max_new_tokens,
             temperature=temperature,
         )
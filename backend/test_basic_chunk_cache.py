@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+"""
+The serverless LLM handler's basic-chunk cache stays bounded
+"""
+
+from testing_utils import load_handler, run_tests
+
+def test_basic_chunk_cache_is_bounded():
+    """Only digests of small texts are kept, up to BASIC_CACHE_SIZE entries"""
+    module = load_handler('backend/api/parse-thoughts-llm.py')
+    for i in range(module.BASIC_CACHE_SIZE + 10):
+        module._basic_chunks(f"thought number {i}. and another one")
+    assert len(module._basic_cache) == module.BASIC_CACHE_SIZE
+    assert all(isinstance(key, bytes) and len(key) == 16 for key in module._basic_cache)
+
+    small = "I need milk. Then call Sarah"
+    assert module._basic_chunks(small) is module._basic_chunks(small)
+
+    large = "call Sarah and buy milk. " * (module.BASIC_CACHE_MAX_TEXT // 20)
+    assert len(large) > module.BASIC_CACHE_MAX_TEXT
+    assert module._basic_chunks(large) == module._basic_chunks(large)
+    assert module._basic_chunks(large) is not module._basic_chunks(large)
+
+if __name__ == "__main__":
+    run_tests(globals())
@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+"""
+The LLM parse handlers refuse oversized bodies with a JSON 413
+"""
+
+import json
+
+from testing_utils import load_handler, run_tests, serve_request
+
+def test_oversized_body_gets_json_413():
+    """Bodies over MAX_BODY_SIZE are refused, unread, with an error the browser can read"""
+    for relpath in ('api/parse-thoughts-llm.py', 'backend/api/parse-thoughts-llm.py'):
+        module = load_handler(relpath)
+        # Only the header is sent; the handler must answer without waiting for the body
+        headers = {'Content-Type': 'application/json', 'Content-Length': str(module.MAX_BODY_SIZE + 1)}
+        status, response_headers, body = serve_request(module, 'POST', headers=headers)
+        assert status == 413, (relpath, status)
+        assert response_headers['Content-Type'] == 'application/json', relpath
+        assert response_headers['Access-Control-Allow-Origin'] == '*', relpath
+        assert json.loads(body) == {"error": "Request body too large"}, relpath
+
+if __name__ == "__main__":
+    run_tests(globals())
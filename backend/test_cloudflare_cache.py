@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Cloudflare results are cached for LLM_CACHE_TTL seconds
+"""
+
+import json
+import time
+import types
+
+from testing_utils import load_handler, new_handler, patched, run_tests
+
+class FakeCloudflareResponse:
+    """Just enough of http.client.HTTPResponse for parse_thoughts_llm_enhanced"""
+    status = 200
+    headers = {}
+
+    def __init__(self, payload):
+        self.body = json.dumps(payload).encode()
+
+    def read(self):
+        return self.body
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+def test_cloudflare_cache_expires_after_ttl():
+    """Repeated text is served from the cache until LLM_CACHE_TTL has passed"""
+    module = load_handler('api/parse-thoughts-llm.py')
+    calls = []
+    clock = [1000.0]
+    payload = {'success': True, 'thought_groups': [{'id': 1, 'combined_text': 'Call Sarah about the report'}]}
+
+    def fake_post(body, headers, timeout=None):
+        calls.append(body)
+        return FakeCloudflareResponse(payload)
+
+    fake_time = types.SimpleNamespace(time=time.time, monotonic=lambda: clock[0])
+    with patched(module, cloudflare_post=fake_post, time=fake_time):
+        parser = new_handler(module)
+        text = "Call Sarah about the report before the meeting tomorrow"
+
+        first = parser.parse_thoughts_llm_enhanced(text)
+        assert first['llm_processed'] and len(calls) == 1
+        assert 'cache_hit' not in first['verbose_log']
+
+        clock[0] += module.LLM_CACHE_TTL - 1
+        second = parser.parse_thoughts_llm_enhanced(text)
+        assert len(calls) == 1
+        assert second['verbose_log']['cache_hit'] is True
+        assert second['chunks'] == first['chunks']
+        # The hit copies verbose_log, so the cached entry itself is unchanged
+        assert 'cache_hit' not in first['verbose_log']
+
+        clock[0] += 2
+        parser.parse_thoughts_llm_enhanced(text)
+        assert len(calls) == 2
+
+if __name__ == "__main__":
+    run_tests(globals())
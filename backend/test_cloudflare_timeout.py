@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""
+CF_TIMEOUT is parsed defensively
+"""
+
+import os
+from unittest import mock
+
+from testing_utils import load_handler, run_tests
+
+def timeout_for(value):
+    with mock.patch.dict(os.environ, {'CF_TIMEOUT': value}):
+        return load_handler('api/parse-thoughts-llm.py').CLOUDFLARE_TIMEOUT
+
+def test_valid_cf_timeout_is_used():
+    assert timeout_for('8') == 8.0
+    assert timeout_for(' 2.5 ') == 2.5
+
+def test_invalid_cf_timeout_falls_back_to_default():
+    for value in ('', 'abc', '0', '-3', 'nan', 'inf'):
+        assert timeout_for(value) == 15.0, value
+
+if __name__ == "__main__":
+    run_tests(globals())
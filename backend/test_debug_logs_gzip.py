@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+debug-logs only gzips when the client's Accept-Encoding allows it
+"""
+
+import gzip
+import json
+
+from testing_utils import load_handler, run_tests, serve_request
+
+def test_accepts_gzip_honours_q_values():
+    accepts_gzip = load_handler('api/debug-logs.py').accepts_gzip
+    assert accepts_gzip('gzip')
+    assert accepts_gzip('br, GZIP;q=0.5')
+    assert accepts_gzip('deflate, *')
+    assert not accepts_gzip('')
+    assert not accepts_gzip('identity, br')
+    assert not accepts_gzip('gzip;q=0')
+    assert not accepts_gzip('gzip; q=0.0, *')
+    assert not accepts_gzip('*;q=0')
+
+def test_refused_gzip_gets_plain_body():
+    module = load_handler('api/debug-logs.py')
+    for i in range(20):
+        module.add_debug_log({'type': 'test', 'message': f'entry {i} ' * 10})
+
+    status, headers, body = serve_request(module, 'GET', headers={'Accept-Encoding': 'gzip;q=0, identity'})
+    assert status == 200
+    assert 'Content-Encoding' not in headers
+    assert json.loads(body)['total_logs'] == 20
+
+    status, headers, body = serve_request(module, 'GET', headers={'Accept-Encoding': 'gzip'})
+    assert status == 200
+    assert headers['Content-Encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(body))['total_logs'] == 20
+
+if __name__ == "__main__":
+    run_tests(globals())
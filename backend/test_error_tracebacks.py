@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Parse handlers only put tracebacks in 500 responses when DEBUG is set
+"""
+
+import json
+
+from testing_utils import load_handler, patched, run_tests, serve_request
+
+HANDLERS = ('api/parse-thoughts.py', 'backend/api/parse-thoughts.py', 'api/parse-thoughts-llm.py')
+
+def post_bad_json(module):
+    status, _, body = serve_request(module, 'POST', b'{not json', {'Content-Type': 'application/json'})
+    assert status == 500, status
+    return json.loads(body)
+
+def test_500_hides_traceback_without_debug():
+    for relpath in HANDLERS:
+        module = load_handler(relpath)
+        with patched(module, DEBUG=False):
+            error = post_bad_json(module)
+        assert 'traceback' not in error, relpath
+        assert error['error'] and error['type'], relpath
+
+def test_500_includes_traceback_under_debug():
+    for relpath in HANDLERS:
+        module = load_handler(relpath)
+        with patched(module, DEBUG=True):
+            error = post_bad_json(module)
+        assert error['traceback'].startswith('Traceback'), relpath
+
+if __name__ == "__main__":
+    run_tests(globals())
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Chunk pairs with too little content-word overlap never reach Gemma
+"""
+
+import asyncio
+
+from testing_utils import FakeGemma, load_handler, new_handler, patched, relationship_stubs, run_tests
+
+import app
+from chunk_overlap import RELATIONSHIP_MIN_OVERLAP, content_words, has_overlap
+
+def test_has_overlap_uses_jaccard_threshold():
+    """Pairs pass when shared content words reach RELATIONSHIP_MIN_OVERLAP of the union"""
+    assert content_words("The boss, Sarah, was ANGRY at me") == {'boss', 'sarah', 'angry'}
+
+    sarah = content_words("my boss Sarah was angry")
+    assert has_overlap(sarah, content_words("Sarah yelled again today"))
+    assert not has_overlap(sarah, content_words("I need groceries"))
+    assert not has_overlap(frozenset(), frozenset())
+
+    # One shared word among twenty-one distinct ones falls below 0.05
+    many_a = frozenset(['shared'] + [f'alpha{c}' for c in 'abcdefghij'])
+    many_b = frozenset(['shared'] + [f'beta{c}' for c in 'abcdefghij'])
+    assert 1 / len(many_a | many_b) < RELATIONSHIP_MIN_OVERLAP
+    assert not has_overlap(many_a, many_b)
+    assert has_overlap(many_a, many_b, threshold=0.01)
+
+def test_app_and_handler_send_the_same_pairs():
+    """The FastAPI app and the serverless LLM handler pre-filter pairs identically"""
+    texts = ['my boss Sarah was angry', 'Sarah yelled again today', 'I need groceries',
+             'the weather', 'groceries for dinner']
+    chunks = [{'id': i + 1, 'text': text} for i, text in enumerate(texts)]
+    expected = [(texts[0], texts[1]), (texts[2], texts[4])]
+
+    app_gemma = FakeGemma()
+    with patched(app, _GEMMA=app_gemma, **relationship_stubs(app)):
+        asyncio.run(app.parse_thoughts_with_llm_sync(chunks))
+    assert app_gemma.segment_pairs() == expected
+
+    module = load_handler('backend/api/parse-thoughts-llm.py')
+    handler_gemma = FakeGemma()
+    with patched(module, get_gemma_model=lambda: handler_gemma, **relationship_stubs(module)):
+        new_handler(module).detect_and_merge_relationships(chunks, "")
+    assert handler_gemma.segment_pairs() == expected
+
+if __name__ == "__main__":
+    run_tests(globals())
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Gemma relationship responses are cached per pair prompt
+"""
+
+from testing_utils import FakeGemma, load_handler, new_handler, patched, relationship_stubs, run_tests
+
+def detect_twice(module, gemma, chunks):
+    with patched(module, get_gemma_model=lambda: gemma, **relationship_stubs(module)):
+        parser = new_handler(module)
+        parser.detect_and_merge_relationships(chunks, "")
+        parser.detect_and_merge_relationships(chunks, "")
+
+def test_answered_pairs_are_not_resent():
+    module = load_handler('backend/api/parse-thoughts-llm.py')
+    chunks = new_handler(module).parse_thoughts_basic(
+        "My boss Sarah was angry today. Sarah yelled at the whole team again"
+    )
+    assert len(chunks) == 2
+
+    gemma = FakeGemma()
+    detect_twice(module, gemma, chunks)
+    assert len(gemma.batches) == 1
+
+def test_empty_answers_are_retried():
+    module = load_handler('backend/api/parse-thoughts-llm.py')
+    chunks = new_handler(module).parse_thoughts_basic(
+        "My boss Sarah was angry today. Sarah yelled at the whole team again"
+    )
+
+    failing = FakeGemma(response="")
+    detect_twice(module, failing, chunks)
+    assert len(failing.batches) == 2
+    assert not module._relationship_cache
+
+if __name__ == "__main__":
+    run_tests(globals())
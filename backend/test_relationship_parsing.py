@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Gemma relationship responses are parsed field by field
+"""
+
+from testing_utils import patched, relationship_stubs, run_tests
+
+import app
+
+def parse(response):
+    with patched(app, ChunkRelationship=relationship_stubs(app)['ChunkRelationship']):
+        return app.parse_relationship_response(response, 2, 3)
+
+def test_fields_are_read_in_any_order():
+    rel = parse("RELATIONSHIP: SAME_PERSON\nCONFIDENCE: 0.95\nREASONING: same boss")
+    assert (rel.chunk1_id, rel.chunk2_id) == (2, 3)
+    assert (rel.relationship_type, rel.confidence) == ('SAME_PERSON', 0.95)
+
+    rel = parse("CONFIDENCE: .8\n  relationship: cause_effect")
+    assert (rel.relationship_type, rel.confidence) == ('CAUSE_EFFECT', 0.8)
+
+def test_echoed_template_is_not_an_answer():
+    """The template's option list is skipped; the model's own answer after it wins"""
+    template = "RELATIONSHIP: [SAME_TOPIC|SAME_PERSON|NONE]\nCONFIDENCE: [0.0 to 1.0]"
+    assert parse(template) is None
+
+    rel = parse(app.create_relationship_prompt("a", "b") + "\nRELATIONSHIP: TEMPORAL\nCONFIDENCE: 0.7")
+    assert (rel.relationship_type, rel.confidence) == ('TEMPORAL', 0.7)
+
+def test_unusable_answers_are_rejected():
+    assert parse("RELATIONSHIP: FRIENDS\nCONFIDENCE: 0.9") is None
+    assert parse("RELATIONSHIP: NONE\nCONFIDENCE: 0.9") is None
+    assert parse("RELATIONSHIP: SAME_TOPIC\nCONFIDENCE: 0") is None
+    assert parse("RELATIONSHIP: SAME_TOPIC") is None
+    assert parse("The answer is RELATIONSHIP: SAME_TOPIC, CONFIDENCE: 0.9") is None
+
+if __name__ == "__main__":
+    run_tests(globals())
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+_split_sentences in the serverless parser library records where each piece starts
+"""
+
+from testing_utils import load_handler, run_tests
+
+def test_split_sentences_offsets_point_into_text():
+    """Each piece's start offset is where that piece begins, including repeated sentences"""
+    parser = load_handler('backend/api/_lib.py').SimpleThoughtParser()
+    text = parser._preprocess_text(
+        "I need to call the bank today. I need to call the bank today! "
+        "Then the report is late and my boss Sarah is waiting but the meeting moved"
+    )
+    sentences = parser._split_sentences(text)
+    assert len(sentences) >= 4, sentences
+    for sentence, start in sentences:
+        assert text.startswith(sentence, start), (sentence, start)
+    starts = [start for _, start in sentences]
+    assert starts == sorted(set(starts)), starts
+
+def test_chunk_start_char_follows_offsets():
+    """Chunks built from the pieces carry the offset of their first piece"""
+    parser = load_handler('backend/api/_lib.py').SimpleThoughtParser()
+    text = "I need to call the bank today. Oh wait the report is late for Sarah today"
+    chunks = parser.parse_thoughts(text)
+    assert [chunk['start_char'] for chunk in chunks] == [0, 31], chunks
+    for chunk in chunks:
+        assert text.startswith(chunk['text'], chunk['start_char']), chunk
+
+if __name__ == "__main__":
+    run_tests(globals())
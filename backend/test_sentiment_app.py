@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+"""
+Sentiment in the FastAPI parser matches whole words only
+"""
+
+from testing_utils import run_tests
+
+import app
+
+def test_app_sentiment_matches_whole_words():
+    """Words that merely contain a sentiment word are neutral"""
+    parser = app.SimpleThoughtParser()
+    assert parser._analyze_sentiment("goodness gracious me") == 'neutral'
+    assert parser._analyze_sentiment("madness and sadness everywhere") == 'neutral'
+    assert parser._analyze_sentiment("a good day at the park") == 'positive'
+    assert parser._analyze_sentiment("so sad and angry about it") == 'negative'
+
+if __name__ == "__main__":
+    run_tests(globals())
@@ -0,0 +1,17 @@
+#!/usr/bin/env python3
+"""
+Cloudflare chunk sentiment in parse-thoughts-llm matches whole words only
+"""
+
+from testing_utils import load_handler, new_handler, run_tests
+
+def test_llm_chunk_sentiment_matches_whole_words():
+    """Words that merely contain a sentiment word are neutral"""
+    analyze_chunk = new_handler(load_handler('api/parse-thoughts-llm.py')).analyze_chunk
+    assert analyze_chunk("goodness gracious me")[1] == 'neutral'
+    assert analyze_chunk("madness and sadness everywhere")[1] == 'neutral'
+    assert analyze_chunk("Great news, truly great")[1] == 'positive'
+    assert analyze_chunk("so sad and angry about it")[1] == 'negative'
+
+if __name__ == "__main__":
+    run_tests(globals())
@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+"""
+Sentiment in both parse-thoughts handlers matches whole words only
+"""
+
+from testing_utils import load_handler, new_handler, run_tests
+
+def test_parse_thoughts_sentiment_matches_whole_words():
+    """Words that merely contain a sentiment word are neutral"""
+    for relpath in ('api/parse-thoughts.py', 'backend/api/parse-thoughts.py'):
+        analyze_sentiment = new_handler(load_handler(relpath)).analyze_sentiment
+        assert analyze_sentiment("goodness gracious me") == 'neutral', relpath
+        assert analyze_sentiment("madness and sadness everywhere") == 'neutral', relpath
+        assert analyze_sentiment("a good day at the park") == 'positive', relpath
+        assert analyze_sentiment("so sad and angry about it") == 'negative', relpath
+
+if __name__ == "__main__":
+    run_tests(globals())
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+The serverless LLM handler imports spacy-llm once, even under concurrent first requests
+"""
+
+import importlib.abc
+import importlib.util
+import sys
+import threading
+import time
+import types
+from unittest import mock
+
+from testing_utils import load_handler, run_tests
+
+class SlowSpacyFinder(importlib.abc.MetaPathFinder, importlib.abc.Loader):
+    """Serves a fake 'spacy' package whose import blocks until released"""
+    def __init__(self):
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def find_spec(self, name, path, target=None):
+        if name == 'spacy':
+            return importlib.util.spec_from_loader(name, self, is_package=True)
+        return None
+
+    def create_module(self, spec):
+        return None
+
+    def exec_module(self, module):
+        self.entered.set()
+        self.release.wait(5)
+
+def fake_module(name, **attrs):
+    module = types.ModuleType(name)
+    module.__path__ = []
+    module.__dict__.update(attrs)
+    return module
+
+def test_concurrent_first_requests_both_see_spacy():
+    """A request arriving while the first import runs waits for it instead of falling back"""
+    module = load_handler('backend/api/parse-thoughts-llm.py')
+    finder = SlowSpacyFinder()
+    fakes = {
+        'spacy.tokens': fake_module('spacy.tokens', Doc=object),
+        'spacy_llm': fake_module('spacy_llm'),
+        'spacy_llm.util': fake_module('spacy_llm.util', assemble=None),
+        'models': fake_module('models'),
+        'models.gemma_loader': fake_module('models.gemma_loader', get_gemma_model=None, GemmaModel=None),
+        'spacy_llm_tasks': fake_module('spacy_llm_tasks'),
+        'spacy_llm_tasks.chunk_relationship': fake_module(
+            'spacy_llm_tasks.chunk_relationship', merge_related_chunks=None, ChunkRelationship=None
+        ),
+    }
+    results = []
+    with mock.patch.dict(sys.modules, fakes):
+        sys.modules.pop('spacy', None)
+        sys.meta_path.insert(0, finder)
+        try:
+            first = threading.Thread(target=lambda: results.append(module._ensure_spacy()))
+            first.start()
+            assert finder.entered.wait(5)
+
+            second = threading.Thread(target=lambda: results.append(module._ensure_spacy()))
+            second.start()
+            time.sleep(0.1)  # Let the second request reach the check while the import is still running
+            finder.release.set()
+            first.join(5)
+            second.join(5)
+        finally:
+            sys.meta_path.remove(finder)
+
+    assert results == [True, True], results
+    assert module._spacy_state['loaded'] and module.SPACY_AVAILABLE
+
+if __name__ == "__main__":
+    run_tests(globals())
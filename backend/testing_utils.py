@@ -0,0 +1,110 @@
+"""
+Helpers shared by the focused backend tests (test_*.py next to this file)
+"""
+
+import http.client
+import importlib.util
+import os
+import re
+import sys
+import threading
+from contextlib import contextmanager
+from http.server import ThreadingHTTPServer
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BACKEND_DIR)
+if BACKEND_DIR not in sys.path:
+    sys.path.append(BACKEND_DIR)
+
+def load_handler(relpath):
+    """Import a serverless function file by its path from the repo root (their names contain hyphens)"""
+    saved_path = list(sys.path)
+    name = re.sub(r'\W', '_', relpath[:-3])
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT_DIR, relpath))
+    module = importlib.util.module_from_spec(spec)
+    try:
+        spec.loader.exec_module(module)
+    finally:
+        # Some handlers filter sys.path on import; keep that from leaking into later tests
+        sys.path[:] = saved_path
+    return module
+
+def new_handler(module):
+    """A handler instance for calling its helper methods without a socket"""
+    return module.handler.__new__(module.handler)
+
+def serve_request(module, method, body=b'', headers=None, path='/'):
+    """Send one request to the module's handler on a local port; return status, headers and body"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), module.handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        conn = http.client.HTTPConnection(*server.server_address, timeout=5)
+        conn.request(method, path, body=body, headers=headers or {})
+        response = conn.getresponse()
+        return response.status, dict(response.getheaders()), response.read()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+@contextmanager
+def patched(module, **attrs):
+    """Temporarily replace module attributes, restoring (or removing) them afterwards"""
+    missing = object()
+    saved = {name: getattr(module, name, missing) for name in attrs}
+    for name, value in attrs.items():
+        setattr(module, name, value)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            if value is missing:
+                delattr(module, name)
+            else:
+                setattr(module, name, value)
+
+class Relationship:
+    """Stand-in for spacy_llm_tasks' ChunkRelationship when spacy-llm isn't installed"""
+    def __init__(self, chunk1_id, chunk2_id, confidence, relationship_type):
+        self.chunk1_id = chunk1_id
+        self.chunk2_id = chunk2_id
+        self.confidence = confidence
+        self.relationship_type = relationship_type
+
+def relationship_stubs(module):
+    """LLM helpers a module needs when spacy-llm (and so the real ones) may be missing"""
+    return {
+        'ChunkRelationship': getattr(module, 'ChunkRelationship', Relationship),
+        'merge_related_chunks': lambda chunks, relationships: chunks,
+    }
+
+class FakeGemma:
+    """Records every prompt batch and answers each prompt with a fixed response"""
+    def __init__(self, response="RELATIONSHIP: SAME_PERSON\nCONFIDENCE: 0.9\nREASONING: same person"):
+        self.response = response
+        self.batches = []
+
+    def is_available(self):
+        return True
+
+    def __call__(self, prompts):
+        self.batches.append(list(prompts))
+        return [self.response] * len(prompts)
+
+    def segment_pairs(self):
+        """The (segment 1, segment 2) texts of every prompt sent so far"""
+        return [tuple(re.findall(r'Segment \d: "(.*)"', prompt)) for batch in self.batches for prompt in batch]
+
+def run_tests(namespace):
+    """Run every test_* function in namespace, print a summary and exit non-zero on failure"""
+    tests = [(name, func) for name, func in namespace.items() if name.startswith('test_') and callable(func)]
+    failed = 0
+    for name, func in tests:
+        try:
+            func()
+            print(f"  ✅ {name}")
+        except Exception as e:
+            failed += 1
+            print(f"  ❌ {name}: {type(e).__name__}: {e}")
+    print(f"\n{len(tests) - failed}/{len(tests)} passed")
+    sys.exit(1 if failed else 0)
@@ -89,6 +89,7 @@ function App() {
                   isLoading={isLoading}
                   setIsLoading={setIsLoading}
                   llmEnabled={llmEnabled}
+                  verbose={debugPanelOpen}
                 />
               </div>
               <div>
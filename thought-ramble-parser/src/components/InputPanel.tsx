@@ -10,9 +10,10 @@ interface InputPanelProps {
   isLoading: boolean;
   setIsLoading: (loading: boolean) => void;
   llmEnabled: boolean;
+  verbose?: boolean;
 }
 
-export function InputPanel({ onParseResult, isLoading, setIsLoading, llmEnabled }: InputPanelProps) {
+export function InputPanel({ onParseResult, isLoading, setIsLoading, llmEnabled, verbose = false }: InputPanelProps) {
   const [inputText, setInputText] = useState('');
   const [sampleData, setSampleData] = useState<SampleRambles | null>(null);
   const [error, setError] = useState<string>('');
@@ -49,7 +50,8 @@ export function InputPanel({ onParseResult, isLoading, setIsLoading, llmEnabled
         text: inputText.trim(),
         provider: 'openai',
         model: 'gpt-3.5-turbo',
-        enable_llm: llmEnabled
+        enable_llm: llmEnabled,
+        verbose
       });
       
       onParseResult(result);
@@ -15,6 +15,7 @@ export interface ThoughtParseRequest {
   provider?: string;
   model?: string;
   enable_llm?: boolean;
+  verbose?: boolean;
 }
 
 export interface VerboseLog {
@@ -125,6 +126,8 @@ class ThoughtParserAPI {
         provider: request.provider || 'openai',
         model: request.model || 'gpt-3.5-turbo',
         enable_llm: request.enable_llm || false,
+        // Raw upstream payloads are only requested when the debug panel is open
+        verbose: request.verbose ?? false,
       }),
     });
 